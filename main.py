@@ -13,7 +13,7 @@ from src.config import config
 from src.trading_engine import TradingEngine
 from src.backtest_engine import backtest_engine
 from src.api import run_api_server
-from src.data_manager_fixed import data_manager
+from src.data_manager import data_manager
 from src.notifications import notification_manager
 
 
@@ -57,6 +57,9 @@ async def run_trading_bot(strategy_name: str = "ma_cross", **strategy_params):
         logger.error(f"Trading bot error: {e}")
         await notification_manager.notify_error(f"Trading bot crashed: {e}")
         raise
+    finally:
+        await data_manager.aclose()
+        await notification_manager.aclose()
 
 
 async def run_backtest(strategy_name: str, symbols: list, days: int = 30, **strategy_params):
@@ -145,6 +148,8 @@ async def test_notifications():
     except Exception as e:
         logger.error(f"Notification test failed: {e}")
         raise
+    finally:
+        await notification_manager.aclose()
 
 
 def main():
@@ -2,6 +2,7 @@
 Main FastAPI application for the trading bot
 """
 import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from fastapi import FastAPI, HTTPException, BackgroundTasks
@@ -23,8 +24,8 @@ from ..config import config
 from ..trading_engine import TradingEngine
 from ..backtest_engine import backtest_engine
 from ..risk_manager import risk_manager
-from ..data_manager_fixed import data_manager
 from ..binance_client import binance_client
+from ..notifications import notification_manager
 from .. import shared_state
 
 from .models import StrategyConfig, BacktestRequest, TradingStatus
@@ -37,11 +38,18 @@ from .routes.pages import router as pages_router, get_dashboard_html
 # Global trading engine instance
 # trading_engine = None
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Server lifecycle: flush queued notifications and close their HTTP session on shutdown"""
+    yield
+    await notification_manager.aclose()
+
 # Create FastAPI app
 app = FastAPI(
     title="Binance Trading Bot API",
     description="API for managing the Binance trading bot",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -11,7 +11,7 @@ except ImportError:
 
 from ...config import config
 from ...binance_client import binance_client
-from ...data_manager_fixed import data_manager
+from ...data_manager import get_data_manager
 
 router = APIRouter()
 
@@ -51,7 +51,7 @@ async def get_strategies():
 async def get_market_data(symbol: str, timeframe: str, limit: int = 100):
     """Get market data for a symbol"""
     try:
-        df = data_manager.get_market_data(symbol, timeframe, limit=limit)
+        df = get_data_manager().get_market_data(symbol, timeframe, limit=limit)
         
         if df.empty:
             raise HTTPException(status_code=404, detail="No data found")
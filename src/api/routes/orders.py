@@ -46,15 +46,17 @@ async def get_order_history(limit: int = 50):
     """Get order history"""
     try:
         client = get_client()
-        if config.binance.paper_trading and hasattr(client, 'paper_orders'):
-            orders = client.paper_orders[-limit:] if client.paper_orders else []
+        if config.binance.paper_trading and hasattr(client, 'recent_orders'):
+            orders = client.recent_orders(limit)
         elif hasattr(client, 'get_order_history'):
             orders = client.get_order_history(limit)
         else:
             orders = []
         # 格式化訂單數據以便前端顯示
+        trading_mode = "📋 紙上交易" if config.binance.paper_trading else ("🎮 模擬交易" if config.binance.demo_mode else "真實交易")
         formatted_orders = []
         for order in orders:
+            order_time = order.get("time")
             formatted_order = {
                 "orderId": order.get("orderId"),
                 "symbol": order.get("symbol"),
@@ -64,9 +66,9 @@ async def get_order_history(limit: int = 50):
                 "executed_quantity": order.get("executedQty"),
                 "price": order.get("price"),
                 "status": order.get("status"),
-                "time": datetime.fromtimestamp(order.get("time", 0) / 1000).strftime("%Y-%m-%d %H:%M:%S") if order.get("time") else "N/A",
+                "time": datetime.fromtimestamp(order_time / 1000).strftime("%Y-%m-%d %H:%M:%S") if order_time else "N/A",
                 "commission": order.get("commission", "0"),
-                "trading_mode": "📋 紙上交易" if config.binance.paper_trading else ("🎮 模擬交易" if config.binance.demo_mode else "真實交易")
+                "trading_mode": trading_mode
             }
             formatted_orders.append(formatted_order)
         return formatted_orders
@@ -24,7 +24,7 @@ from .config import config
 from .trading_engine import TradingEngine
 from .backtest_engine import backtest_engine
 from .risk_manager import risk_manager
-from .data_manager_fixed import data_manager
+from .data_manager import data_manager
 from .binance_client import binance_client
 
 
@@ -15,7 +15,7 @@ except ImportError:
     logger = logging.getLogger(__name__)
 
 from .config import config
-from .data_manager_fixed import data_manager
+from .data_manager import get_data_manager
 from .strategies import get_strategy
 
 
@@ -71,7 +71,7 @@ class BacktestEngine:
             all_data = {}
             for symbol in symbols:
                 try:
-                    df = data_manager.get_market_data(
+                    df = get_data_manager().get_market_data(
                         symbol, timeframe, start_time=start_date, end_time=end_date
                     )
                     if df is not None and not df.empty:
@@ -1,18 +1,34 @@
 """
 Binance API client wrapper with paper trading support
 """
+import asyncio
+import functools
+import heapq
+import json
+import threading
 import time
-from typing import List, Dict, Any, Union, Optional
-from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor
+from operator import itemgetter
+from typing import List, Dict, Any, Union, Optional, Callable, AbstractSet
+from datetime import datetime, timezone
+from decimal import Decimal, ROUND_DOWN
+from types import MappingProxyType
+
+import numpy as np
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException, Timeout, ConnectionError as RequestsConnectionError
 
 try:
-    from binance.client import Client
+    from binance.client import Client, AsyncClient
+    from binance.streams import ThreadedWebsocketManager
     from binance.enums import SIDE_BUY, SIDE_SELL, ORDER_TYPE_MARKET, ORDER_TYPE_LIMIT
-    from binance.exceptions import BinanceAPIException, BinanceOrderException  # type: ignore
+    from binance.exceptions import BinanceAPIException, BinanceOrderException, BinanceRequestException  # type: ignore
     BINANCE_AVAILABLE = True
 except ImportError:
     # Fallback if binance module is not available
     Client = None
+    AsyncClient = None
+    ThreadedWebsocketManager = None
     SIDE_BUY = "BUY"
     SIDE_SELL = "SELL"
     ORDER_TYPE_MARKET = "MARKET"
@@ -24,6 +40,31 @@ except ImportError:
     
     class BinanceOrderException(Exception):
         pass
+    
+    class BinanceRequestException(Exception):
+        pass
+
+try:
+    # orjson 解碼大型回應（K 線、全市場 ticker、exchange info）比標準庫 json 快數倍
+    from orjson import loads as _json_loads
+    ORJSON_AVAILABLE = True
+except ImportError:
+    from json import loads as _json_loads
+    ORJSON_AVAILABLE = False
+
+try:
+    # 非同步客戶端的公開行情改走 httpx，HTTP/2 下併發請求共用同一條 TLS 連線
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTPX_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401  httpx 啟用 http2 需要 h2 套件
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 try:
     from loguru import logger
@@ -33,6 +74,9 @@ except ImportError:
 
 from .config import config
 from . import shared_state
+from .rate_limiter import REQUEST_WEIGHTS, USED_WEIGHT_HEADER, klines_weight, get_request_bucket
+from .ttl_cache import TTLCache, kline_cache_ttl
+from .symbol_filter import SymInfo, active_symbols
 
 # Demo 模式和紙上交易支援
 if config.binance.demo_mode:
@@ -41,19 +85,354 @@ elif config.binance.paper_trading:
     from .paper_trading_client import PaperTradingClient
 
 
+# 非同步客戶端同時進行中的請求上限，避免超出 Binance 權重限制
+ASYNC_MAX_CONCURRENCY = 20
+
+# 同步批次抓取 K 線時的執行緒數
+KLINES_FETCH_WORKERS = 10
+
+# 非同步公開行情端點（與同步客戶端的 get_klines / get_ticker 相同的現貨 REST API）
+SPOT_REST_URL = 'https://api.binance.com'
+SPOT_TESTNET_REST_URL = 'https://testnet.binance.vision'
+HTTPX_MAX_KEEPALIVE = 20
+HTTPX_MAX_CONNECTIONS = 50
+
+# 白名單數量不超過此值時，改用批次 symbols 參數查詢 24hr ticker
+WHITELIST_TICKER_BATCH_LIMIT = 20
+
+# 需要帶 price / timeInForce 的合約訂單類型
+_FUTURES_PRICED_ORDER_TYPES = frozenset({'LIMIT', 'STOP', 'TAKE_PROFIT'})
+
+# DELETE /fapi/v1/batchOrders 每次最多取消的訂單數
+FUTURES_BATCH_CANCEL_LIMIT = 10
+
+# 單一交易對價格快取有效時間（秒），吸收短時間內的重複查詢
+PRICE_CACHE_TTL = 0.2
+
+# 單一交易對 24 小時統計的快取秒數
+TICKER_24HR_CACHE_TTL = 2.0
+
+
+# 可重試的暫時性錯誤碼：-1003 請求過多 / IP 封鎖，-1015 下單過多
+RETRYABLE_API_CODES = (-1003, -1015)
+# 伺服器要求等待超過此秒數時不再重試，直接拋出
+MAX_RETRY_AFTER = 60.0
+
+# 外部 API / 網路錯誤；其餘例外（ValueError、KeyError 等）視為程式錯誤直接拋出
+API_ERRORS = (BinanceAPIException, BinanceRequestException, RequestException)
+
+
+# Demo / 紙上交易模式的模擬回應模板（模組載入時建立一次，回傳時淺拷貝）
+_FUTURES_ACCOUNT_MOCK = MappingProxyType({
+    "totalWalletBalance": "10000.00000000",
+    "totalUnrealizedProfit": "0.00000000",
+    "totalMarginBalance": "10000.00000000",
+    "totalPositionInitialMargin": "0.00000000",
+    "totalOpenOrderInitialMargin": "0.00000000",
+    "maxWithdrawAmount": "10000.00000000",
+    "assets": (
+        {
+            "asset": "USDT",
+            "walletBalance": "10000.00000000",
+            "unrealizedProfit": "0.00000000"
+        },
+    )
+})
+
+_FUTURES_POSITION_MOCK = MappingProxyType({
+    "symbol": "",
+    "positionAmt": "0.000",
+    "entryPrice": "0.0000",
+    "markPrice": "0.0000",
+    "unRealizedProfit": "0.0000",
+    "liquidationPrice": "0",
+    "leverage": "20",
+    "maxNotionalValue": "1000000",
+    "marginType": "cross",
+    "isolatedMargin": "0.00000000",
+    "isAutoAddMargin": "false",
+    "positionSide": "BOTH",
+    "notional": "0",
+    "isolatedWallet": "0"
+})
+
+# WebSocket 標記價格超過此秒數未更新即視為過期，改走 REST
+MARK_PRICE_STALE_AFTER = 5.0
+
+# !ticker@arr 每秒推送一次；超過此秒數沒有訊息即視為斷線，改走 REST
+TICKER_STREAM_STALE_AFTER = 5.0
+
+# 串流欄位 -> REST 24 小時統計欄位，讓呼叫端不需區分資料來源
+_TICKER_STREAM_FIELDS = (
+    ('s', 'symbol'), ('p', 'priceChange'), ('P', 'priceChangePercent'),
+    ('w', 'weightedAvgPrice'), ('c', 'lastPrice'), ('o', 'openPrice'),
+    ('h', 'highPrice'), ('l', 'lowPrice'), ('v', 'volume'),
+    ('q', 'quoteVolume'), ('n', 'count'),
+)
+
+# exchange info 幾乎不變（數小時才更新），快取一小時
+EXCHANGE_INFO_TTL = 3600.0
+
+
+class _ExchangeInfoSnapshot:
+    """Cached exchange info with per-symbol indexes built once per refresh"""
+    
+    __slots__ = ('fetched_at', 'info', 'symbols', 'syms', 'filters', 'lot_sizes')
+    
+    def __init__(self, info: Dict[str, Any]):
+        self.fetched_at = time.monotonic()
+        self.info = info
+        symbols = info.get('symbols', [])
+        # symbol -> symbol info，以及 symbol -> filterType -> filter，避免線性掃描
+        self.symbols: Dict[str, Dict[str, Any]] = {s['symbol']: s for s in symbols}
+        # 全量掃描用的精簡物件，屬性存取取代多次 dict 查詢
+        self.syms: tuple = tuple(SymInfo(s) for s in symbols)
+        self.filters: Dict[str, Dict[str, Dict[str, Any]]] = {
+            s.symbol: s.filters_by_type for s in self.syms
+        }
+        # symbol -> (stepSize, minQty)，預先轉為 Decimal，計算數量時免去字串解析
+        self.lot_sizes: Dict[str, tuple] = {
+            symbol: (
+                Decimal(lot_size.get('stepSize', '0')).normalize(),
+                Decimal(lot_size.get('minQty', '0')).normalize()
+            )
+            for symbol, filters in self.filters.items()
+            if (lot_size := filters.get('LOT_SIZE'))
+        }
+
+
+_DECIMAL_ZERO = Decimal(0)
+
+# trading_type -> 快取的 exchange info
+_exchange_info_cache: Dict[str, _ExchangeInfoSnapshot] = {}
+
+
+# 常見報價資產，依長度由長到短比對後綴
+_QUOTE_ASSETS = ("USDT", "BUSD", "USDC", "BTC", "ETH", "BNB")
+
+
+@functools.lru_cache(maxsize=4096)
+def _split_symbol(symbol: str) -> tuple:
+    """Split a symbol into (baseAsset, quoteAsset), e.g. BTCUSDT -> (BTC, USDT)"""
+    for quote in _QUOTE_ASSETS:
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            return symbol[:-len(quote)], quote
+    return symbol[:3], symbol[3:]
+
+
+def _mock_symbol_info(symbol: str) -> Dict[str, Any]:
+    """Build mock exchange info for a symbol (demo/paper trading)"""
+    base_asset, quote_asset = _split_symbol(symbol)
+    return {
+        "symbol": symbol,
+        "status": "TRADING",
+        "baseAsset": base_asset,
+        "quoteAsset": quote_asset,
+        "filters": []
+    }
+
+
+_MOCK_SYMBOLS_INFO = tuple(
+    MappingProxyType(_mock_symbol_info(symbol))
+    for symbol in ("BTCUSDT", "ETHUSDT", "ADAUSDT", "BNBUSDT", "XRPUSDT")
+)
+
+
+# 帳戶餘額項目的 (asset, free, locked) 取值器
+_BALANCE_FIELDS = itemgetter('asset', 'free', 'locked')
+
+
+def _to_ms(value: Union[int, datetime]) -> int:
+    """Convert a datetime to epoch milliseconds; integers pass through unchanged"""
+    if type(value) is int:
+        return value
+    if value.tzinfo is None:
+        # 不帶時區的 datetime 視為 UTC（與資料庫儲存的 K 線時間一致），不以本地時區解讀
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+def _as_order_id(order_id: Union[int, str]) -> int:
+    """Normalize an order id; place_order already returns int ids, so skip parsing those"""
+    return order_id if type(order_id) is int else int(order_id)
+
+
+def _is_retryable(exc: Exception) -> bool:
+    """Check whether an exception is a transient network / server error"""
+    if isinstance(exc, (Timeout, RequestsConnectionError)):
+        return True
+    if isinstance(exc, BinanceAPIException):
+        status_code = getattr(exc, 'status_code', 0) or 0
+        return status_code >= 500 or status_code in (418, 429) or getattr(exc, 'code', None) in RETRYABLE_API_CODES
+    return False
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """Read the Retry-After header (seconds) from a Binance error response"""
+    response = getattr(exc, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry(max_attempts: int = 3, backoff: float = 0.5) -> Callable:
+    """Retry idempotent API calls on transient errors with exponential backoff"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(1, max_attempts + 1):
+                try:
+                    return func(*args, **kwargs)
+                except API_ERRORS as e:
+                    if attempt == max_attempts or not _is_retryable(e):
+                        raise
+                    delay = _retry_after(e)
+                    if delay is None:
+                        delay = backoff * (2 ** (attempt - 1))
+                    elif delay > MAX_RETRY_AFTER:
+                        raise
+                    logger.warning(f"{func.__name__} failed ({e}), retrying in {delay:.2f}s "
+                                   f"({attempt}/{max_attempts})")
+                    time.sleep(delay)
+        return wrapper
+    return decorator
+
+
+def _retry_async(max_attempts: int = 3, backoff: float = 0.5) -> Callable:
+    """Async counterpart of _retry; waits with asyncio.sleep so other requests keep flowing"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            for attempt in range(1, max_attempts + 1):
+                try:
+                    return await func(*args, **kwargs)
+                except API_ERRORS as e:
+                    if attempt == max_attempts or not _is_retryable(e):
+                        raise
+                    delay = _retry_after(e)
+                    if delay is None:
+                        delay = backoff * (2 ** (attempt - 1))
+                    elif delay > MAX_RETRY_AFTER:
+                        raise
+                    logger.warning(f"{func.__name__} failed ({e}), retrying in {delay:.2f}s "
+                                   f"({attempt}/{max_attempts})")
+                    await asyncio.sleep(delay)
+        return wrapper
+    return decorator
+
+
+def _sync_used_weight(response) -> None:
+    """Feed the X-MBX-USED-WEIGHT-1M response header back into the shared bucket"""
+    used = response.headers.get(USED_WEIGHT_HEADER)
+    if used is not None:
+        # 現貨與合約的權重上限不同，依回應的端點（/fapi/ 為 USDⓈ-M 合約）判斷
+        trading_type = "futures" if "/fapi/" in str(response.url) else "spot"
+        get_request_bucket().sync_used_weight(int(used), config.binance.get_weight_limit(trading_type))
+
+
+def _fast_handle_response(response) -> Any:
+    """Drop-in replacement for python-binance's response handler using orjson"""
+    _sync_used_weight(response)
+    if not (200 <= response.status_code < 300):
+        raise BinanceAPIException(response, response.status_code, response.text)
+    try:
+        return _json_loads(response.content)
+    except ValueError:
+        raise BinanceRequestException(f"Invalid Response: {response.text}")
+
+
+async def _fast_handle_response_async(response) -> Any:
+    """orjson variant of AsyncClient's aiohttp response handler"""
+    _sync_used_weight(response)
+    body = await response.read()
+    if not (200 <= response.status < 300):
+        raise BinanceAPIException(response, response.status, body.decode())
+    try:
+        return _json_loads(body)
+    except ValueError:
+        raise BinanceRequestException(f"Invalid Response: {body.decode()}")
+
+
+# (api_key, testnet) -> python-binance Client；相同憑證的現貨/合約包裝共用同一個連線池
+_client_registry: Dict[tuple, Any] = {}
+_client_registry_lock = threading.Lock()
+
+# 每個底層 Client 的 HTTP 連線池大小（預設僅 10，併發請求時會重複建立 TLS 連線）
+HTTP_POOL_CONNECTIONS = 32
+HTTP_POOL_MAXSIZE = 64
+
+
+def _get_shared_client(api_key: str, secret_key: str, testnet: bool) -> Any:
+    """Get or create the python-binance Client shared by all wrappers using these credentials"""
+    key = (api_key, testnet)
+    with _client_registry_lock:
+        client = _client_registry.get(key)
+        if client is None:
+            client = Client(api_key, secret_key, testnet=testnet)
+            # 重試由 _retry 負責，連線池層不再重試
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+            client.session.mount('https://', adapter)
+            # 以實例屬性覆寫，所有 REST 回應（含 get_klines）都改用 orjson 解碼並回報已用權重
+            client._handle_response = _fast_handle_response
+            _client_registry[key] = client
+        return client
+
+
 class BinanceClient:
     """Enhanced Binance client with error handling and rate limiting"""
     
+    # 綁定為類別屬性，避免熱路徑上重複查找 time 模組屬性
+    _time_monotonic = time.monotonic
+    
+    # 現貨/合約實例共用的伺服器時間偏移；背景同步完成前為 None，期間使用設定值
+    _global_time_offset: Optional[int] = None
+    _time_sync_lock = threading.Lock()
+    _time_sync_started = False
+    
     def __init__(self, trading_type: str = "futures"):
         self.trading_type = trading_type.lower()
         
+        # 交易模式於初始化時決定一次，方法內不再逐次讀取設定
+        self._simulated = config.binance.demo_mode or config.binance.paper_trading
+        
+        # 真實模式缺少 python-binance 時立即失敗，不留下 client 為 None 的半成品實例
+        if not self._simulated and not BINANCE_AVAILABLE:
+            raise ImportError("python-binance package is required. Install with: pip install python-binance")
+        
+        # 價格快取：symbol -> (monotonic 時間, ticker)；進行中的請求由同一個 Future 共用
+        self._price_cache: Dict[str, tuple] = {}
+        self._price_inflight: Dict[str, Future] = {}
+        self._price_lock = threading.Lock()
+        
+        # 短期讀取快取：同一輪策略評估中重複的 K 線 / 24 小時統計查詢不再打網路
+        self._kline_cache = TTLCache(maxsize=256)
+        self._ticker_24hr_cache = TTLCache(maxsize=512)
+        
+        # WebSocket 標記價格：symbol -> (monotonic 時間, markPrice)，首次查詢時才啟動串流
+        self._mark_prices: Dict[str, tuple] = {}
+        self._mark_price_ws = None
+        
+        # WebSocket 24 小時統計：symbol -> ticker；以全市場 REST 結果打底，之後由串流增量更新
+        self._tickers: Dict[str, Dict[str, Any]] = {}
+        self._tickers_seeded = False
+        self._ticker_stream_at = 0.0
+        self._ticker_ws = None
+        
+        # 白名單/黑名單於初始化時轉為 frozenset，篩選時為 O(1) 成員檢查
+        self._whitelist: AbstractSet[str] = config.trading.whitelist
+        self._blacklist: AbstractSet[str] = config.trading.blacklist
+        
         # 檢查交易模式
         if config.binance.demo_mode:
             logger.info("🎮 Demo 模式已啟動 - 使用完全模擬的交易客戶端")
             self.client = demo_client
             self.time_offset = 0
-            self.last_request_time = 0
-            self.request_interval = 0.1
+            self._bucket = get_request_bucket()
+            # 完全模擬、不發網路請求，無需限速
+            self._rate_limit = self._skip_rate_limit
+            self._get_order_history_impl = self._demo_order_history
             return
         elif config.binance.paper_trading:
             logger.info("📋 紙上交易模式已啟動 - 使用真實數據但虛擬資金")
@@ -69,127 +448,253 @@ class BinanceClient:
                 
             self.client = paper_client
             self.time_offset = paper_client.time_offset
-            self.last_request_time = 0
-            self.request_interval = 0.1
+            # 紙上交易的行情仍來自真實 API，同樣改用 orjson 解析大型回應並回報已用權重
+            real_client = getattr(paper_client, 'real_client', None)
+            if real_client is not None:
+                real_client._handle_response = _fast_handle_response
+            self._bucket = get_request_bucket()
+            self._get_order_history_impl = self._paper_order_history
             return
         
         # 正常模式初始化
-        if Client is None:
-            raise ImportError("python-binance package is required. Install with: pip install python-binance")
-        
         # 獲取對應的 API 憑證
         api_key, secret_key = config.binance.get_api_credentials(self.trading_type)
         
         if not api_key or not secret_key:
             raise ValueError(f"Missing API credentials for {self.trading_type} trading")
             
-        self.client = Client(
-            api_key,
-            secret_key,
-            testnet=config.binance.testnet
-        )
+        self.client = _get_shared_client(api_key, secret_key, config.binance.testnet)
+        self._get_order_history_impl = self._live_order_history
         
-        # 啟用自動時間同步以避免時間戳錯誤
+        # 先使用設定的時間偏移，伺服器時間於背景同步，不阻塞啟動
         self.time_offset = config.binance.time_offset  # 從配置讀取時間偏移
+        self._bucket = get_request_bucket()
+        self._start_time_sync()
+        logger.info(f"Initialized Binance client for {self.trading_type} trading (testnet: {config.binance.testnet})")
+
+    def _start_time_sync(self) -> None:
+        """Sync the server time offset on a background thread (once per process)"""
+        with BinanceClient._time_sync_lock:
+            if BinanceClient._time_sync_started:
+                return
+            BinanceClient._time_sync_started = True
+        threading.Thread(target=self._sync_time_in_background, name="binance-time-sync", daemon=True).start()
+
+    def _sync_time_in_background(self) -> None:
+        """Fetch server time and publish the offset shared by all instances"""
         try:
-            # 獲取伺服器時間並計算時間偏移
+            self._rate_limit()
             server_time = self.client.get_server_time()
-            local_time = int(time.time() * 1000) + self.time_offset
-            calculated_offset = server_time['serverTime'] - local_time
-            logger.info(f"Calculated server time offset: {calculated_offset}ms")
-            logger.info(f"Using configured time offset: {self.time_offset}ms")
-                
+            offset = server_time['serverTime'] - time.time_ns() // 1_000_000
+            # 單一屬性賦值為原子操作，讀取端無需加鎖
+            BinanceClient._global_time_offset = offset
+            logger.info(f"Calculated server time offset: {offset}ms")
         except Exception as e:
-            logger.warning(f"Failed to sync server time: {e}")
-            
-        self.last_request_time = 0
-        self.request_interval = 0.1  # Minimum interval between requests        
-        logger.info(f"Initialized Binance client for {self.trading_type} trading (testnet: {config.binance.testnet})")
+            logger.warning(f"Failed to sync server time, using configured offset {self.time_offset}ms: {e}")
+            # 允許下一個實例重試
+            with BinanceClient._time_sync_lock:
+                BinanceClient._time_sync_started = False
+
+    def _now_ms(self) -> int:
+        """Current server-aligned time in integer milliseconds"""
+        offset = BinanceClient._global_time_offset
+        if offset is None:
+            offset = self.time_offset
+        # time_ns 整數運算避免浮點數在毫秒精度的捨入誤差（-1021 錯誤來源之一）
+        return time.time_ns() // 1_000_000 + offset
 
     def get_adjusted_timestamp(self) -> int:
         """Get adjusted timestamp for API calls"""
-        return int(time.time() * 1000) + self.time_offset
+        return self._now_ms()
 
-    def _rate_limit(self):
+    def _rate_limit(self, weight: int = 1):
         """Implement rate limiting to avoid API limits"""
-        current_time = time.time()
-        elapsed = current_time - self.last_request_time
-        if elapsed < self.request_interval:
-            time.sleep(self.request_interval - elapsed)
-        self.last_request_time = time.time()
+        wait = self._bucket.consume(weight)
+        if wait:
+            time.sleep(wait)
 
+    def _skip_rate_limit(self, weight: int = 1) -> None:
+        """Rate limiter used in demo mode, where no request leaves the process"""
+
+    @_retry()
     def get_account_info(self) -> Dict[str, Any]:
         """Get account information"""
         try:
-            self._rate_limit()
+            self._rate_limit(REQUEST_WEIGHTS['account'])
             return self.client.get_account()
         except Exception as e:
             logger.error(f"Failed to get account info: {e}")
             raise
 
-    def get_balance(self, asset: Optional[str] = None) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
-        """Get account balance for specific asset or all assets"""
+    def get_balance(self, asset: Optional[str] = None) -> Union[Dict[str, float], Dict[str, Dict[str, float]]]:
+        """Get account balance for specific asset or all non-zero assets as free/locked/total floats"""
         try:
             account_info = self.get_account_info()
             balances = account_info.get('balances', [])
             
             if asset:
                 # Return specific asset balance
-                for balance in balances:
-                    if balance.get('asset') == asset:
-                        return balance
-                return {'asset': asset, 'free': '0.0', 'locked': '0.0'}
+                for name, free, locked in map(_BALANCE_FIELDS, balances):
+                    if name == asset:
+                        free, locked = float(free), float(locked)
+                        return {'free': free, 'locked': locked, 'total': free + locked}
+                return {'free': 0.0, 'locked': 0.0, 'total': 0.0}
             else:
-                # Return all balances
-                return balances
+                # Return all non-zero balances；每個欄位只轉換一次 float
+                return {
+                    name: {'free': free, 'locked': locked, 'total': total}
+                    for name, free, locked in (
+                        (name, float(free), float(locked))
+                        for name, free, locked in map(_BALANCE_FIELDS, balances)
+                    )
+                    if (total := free + locked) > 0
+                }
         except Exception as e:
             logger.error(f"Failed to get balance: {e}")
             raise
 
+    @_retry()
     def get_klines(self, symbol: str, interval: str, limit: int = 500, 
-                   start_time: Optional[int] = None, end_time: Optional[int] = None) -> List[List[str]]:
+                   start_time: Union[int, datetime, None] = None,
+                   end_time: Union[int, datetime, None] = None) -> List[List[str]]:
         """Get kline/candlestick data"""
         try:
-            self._rate_limit()
             kwargs = {
                 'symbol': symbol,
                 'interval': interval,
                 'limit': limit
             }
             if start_time:
-                kwargs['startTime'] = start_time
+                kwargs['startTime'] = _to_ms(start_time)
             if end_time:
-                kwargs['endTime'] = end_time
-                
-            return self.client.get_klines(**kwargs)
+                kwargs['endTime'] = _to_ms(end_time)
+            
+            cache_key = (symbol, interval, limit, kwargs.get('startTime'), kwargs.get('endTime'))
+            klines = self._kline_cache.get(cache_key, kline_cache_ttl(interval))
+            if klines is not None:
+                return klines
+            
+            self._rate_limit(klines_weight(limit))
+            klines = self.client.get_klines(**kwargs)
+            self._kline_cache.set(cache_key, klines)
+            return klines
         except Exception as e:
             logger.error(f"Failed to get klines for {symbol}: {e}")
             raise
 
+    def get_klines_many(self, symbols: List[str], interval: str,
+                        limit: int = 500) -> Dict[str, List[List[str]]]:
+        """Get klines for many symbols in parallel threads; failed symbols are omitted"""
+        def fetch(symbol: str) -> Optional[List[List[str]]]:
+            try:
+                return self.get_klines(symbol, interval, limit=limit)
+            except Exception:
+                # get_klines 已記錄錯誤
+                return None
+        
+        # 共用的 token bucket 是執行緒安全的，併發請求仍受權重限制
+        with ThreadPoolExecutor(max_workers=KLINES_FETCH_WORKERS) as executor:
+            results = executor.map(fetch, symbols)
+            return {symbol: klines for symbol, klines in zip(symbols, results) if klines is not None}
+
+    def get_klines_np(self, symbol: str, interval: str, limit: int = 500,
+                      start_time: Optional[int] = None, end_time: Optional[int] = None) -> np.ndarray:
+        """Get klines as a (N, 6) float64 array: open_time, open, high, low, close, volume"""
+        klines = self.get_klines(symbol, interval, limit=limit, start_time=start_time, end_time=end_time)
+        if not klines:
+            return np.empty((0, 6), dtype=np.float64)
+        # 一次性轉換字串欄位，避免下游指標計算逐一 float()
+        return np.array([kline[:6] for kline in klines], dtype=np.float64)
+
     def get_ticker_price(self, symbol: Optional[str] = None) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
         """Get current price for symbol(s)"""
+        if not symbol:
+            try:
+                self._rate_limit(REQUEST_WEIGHTS['ticker_price_all'])
+                return self.client.get_all_tickers()
+            except Exception as e:
+                logger.error(f"Failed to get ticker price: {e}")
+                raise
+        
+        with self._price_lock:
+            cached = self._price_cache.get(symbol)
+            if cached and self._time_monotonic() - cached[0] < PRICE_CACHE_TTL:
+                return cached[1]
+            future = self._price_inflight.get(symbol)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._price_inflight[symbol] = future
+        
+        # 其他執行緒已在查詢同一交易對，直接等待其結果
+        if not is_owner:
+            return future.result()
+        
         try:
             self._rate_limit()
-            if symbol:
-                return self.client.get_symbol_ticker(symbol=symbol)
-            else:
-                return self.client.get_all_tickers()
+            result = self.client.get_symbol_ticker(symbol=symbol)
         except Exception as e:
             logger.error(f"Failed to get ticker price: {e}")
+            future.set_exception(e)
             raise
+        else:
+            future.set_result(result)
+            with self._price_lock:
+                self._price_cache[symbol] = (self._time_monotonic(), result)
+            return result
+        finally:
+            with self._price_lock:
+                self._price_inflight.pop(symbol, None)
 
+    @_retry()
     def get_24hr_ticker(self, symbol: Optional[str] = None) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
         """Get 24hr ticker statistics"""
         try:
-            self._rate_limit()
+            streaming = not self._simulated
+            if streaming:
+                if self._ticker_ws is None:
+                    self._start_ticker_stream()
+                if self._time_monotonic() - self._ticker_stream_at < TICKER_STREAM_STALE_AFTER:
+                    if symbol:
+                        if symbol in self._tickers:
+                            return self._tickers[symbol]
+                    elif self._tickers_seeded:
+                        return list(self._tickers.values())
+            
             if symbol:
-                return self.client.get_ticker(symbol=symbol)
+                ticker = self._ticker_24hr_cache.get(symbol, TICKER_24HR_CACHE_TTL)
+                if ticker is not None:
+                    return ticker
+                self._rate_limit(REQUEST_WEIGHTS['ticker_24hr'])
+                ticker = self.client.get_ticker(symbol=symbol)
+                self._ticker_24hr_cache.set(symbol, ticker)
+                return ticker
             else:
-                return self.client.get_ticker()
+                self._rate_limit(REQUEST_WEIGHTS['ticker_24hr_all'])
+                tickers = self.client.get_ticker()
+                if streaming and self._ticker_ws:
+                    # 串流只推送有變動的交易對，需先以完整快照打底
+                    self._tickers.update((t['symbol'], t) for t in tickers)
+                    self._tickers_seeded = True
+                return tickers
         except Exception as e:
             logger.error(f"Failed to get 24hr ticker: {e}")
             raise
 
+    def get_24hr_tickers(self, symbols: List[str]) -> List[Dict[str, Any]]:
+        """Get 24hr ticker statistics for a bounded list of symbols"""
+        try:
+            if self._simulated:
+                return [self.get_24hr_ticker(symbol) for symbol in symbols]
+            
+            self._rate_limit(REQUEST_WEIGHTS['ticker_24hr_batch'])
+            # Binance 原生批次參數：symbols=["BTCUSDT","ETHUSDT"]（不可含空白）
+            return self.client.get_ticker(symbols=json.dumps(symbols, separators=(',', ':')))
+        except BinanceAPIException as e:
+            # 白名單含無效交易對時整批會失敗，退回全市場查詢
+            logger.warning(f"Batch 24hr ticker failed, falling back to all tickers: {e}")
+            return self.get_24hr_ticker()
+
     def place_order(self, symbol: str, side: str, order_type: str, 
                    quantity: Optional[float] = None, price: Optional[float] = None,
                    time_in_force: str = 'GTC', **kwargs) -> Dict[str, Any]:
@@ -222,6 +727,9 @@ class BinanceClient:
             
         except BinanceAPIException as e:
             logger.error(f"Binance API error: {e}")
+            if getattr(e, 'code', None) == -1013:
+                # LOT_SIZE 等過濾條件不符，可能是快取的 exchange info 已過期
+                self.invalidate_exchange_info()
             raise
         except BinanceOrderException as e:
             logger.error(f"Binance order error: {e}")
@@ -230,48 +738,120 @@ class BinanceClient:
             logger.error(f"Failed to place order: {e}")
             raise
 
-    def cancel_order(self, symbol: str, order_id: str) -> Dict[str, Any]:
+    def place_futures_order(self, symbol: str, side: str, order_type: str,
+                            quantity: Optional[float] = None, price: Optional[float] = None,
+                            time_in_force: str = 'GTC', reduce_only: bool = False,
+                            **kwargs) -> Dict[str, Any]:
+        """Place a futures order"""
+        order_params = {
+            'symbol': symbol,
+            'side': side,
+            'type': order_type
+        }
+        
+        if quantity:
+            order_params['quantity'] = quantity
+        if price and order_type in _FUTURES_PRICED_ORDER_TYPES:
+            order_params['price'] = price
+            order_params['timeInForce'] = time_in_force
+        if reduce_only:
+            order_params['reduceOnly'] = 'true'
+        
+        # Add any additional parameters
+        order_params.update(kwargs)
+        return self.place_futures_order_fast(order_params)
+
+    def place_futures_order_fast(self, order_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Submit a prebuilt futures order dict as-is, skipping parameter assembly and validation"""
+        try:
+            self._rate_limit()
+            # 時間戳由 python-binance 簽名時補上；呼叫端的 dict 不被修改，可重複使用
+            result = self.client.futures_create_order(**order_params)
+            logger.info(f"Futures order placed successfully: {result.get('orderId', 'Unknown')}")
+            return result
+            
+        except BinanceAPIException as e:
+            logger.error(f"Binance API error: {e}")
+            if getattr(e, 'code', None) == -1013:
+                self.invalidate_exchange_info()
+            raise
+        except BinanceOrderException as e:
+            logger.error(f"Binance order error: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Failed to place futures order: {e}")
+            raise
+
+    def cancel_order(self, symbol: str, order_id: Union[int, str]) -> Dict[str, Any]:
         """Cancel an existing order"""
         try:
             self._rate_limit()
-            return self.client.cancel_order(symbol=symbol, orderId=int(order_id))
+            return self.client.cancel_order(symbol=symbol, orderId=_as_order_id(order_id))
         except Exception as e:
             logger.error(f"Failed to cancel order {order_id}: {e}")
             raise
 
+    def cancel_futures_order(self, symbol: str, order_id: Union[int, str]) -> Dict[str, Any]:
+        """Cancel an existing futures order"""
+        try:
+            self._rate_limit()
+            return self.client.futures_cancel_order(symbol=symbol, orderId=_as_order_id(order_id))
+        except Exception as e:
+            logger.error(f"Failed to cancel futures order {order_id}: {e}")
+            raise
+
+    def cancel_all_futures_orders(self, symbol: str) -> Dict[str, Any]:
+        """Cancel every open futures order for a symbol in a single request"""
+        try:
+            self._rate_limit()
+            return self.client.futures_cancel_all_open_orders(symbol=symbol)
+        except Exception as e:
+            logger.error(f"Failed to cancel all futures orders for {symbol}: {e}")
+            raise
+
+    def cancel_futures_orders_batch(self, symbol: str, order_ids: List[Union[int, str]]) -> List[Dict[str, Any]]:
+        """Cancel futures orders in batches of up to FUTURES_BATCH_CANCEL_LIMIT per request"""
+        ids = [_as_order_id(order_id) for order_id in order_ids]
+        results: List[Dict[str, Any]] = []
+        try:
+            for start in range(0, len(ids), FUTURES_BATCH_CANCEL_LIMIT):
+                chunk = ids[start:start + FUTURES_BATCH_CANCEL_LIMIT]
+                self._rate_limit()
+                results.extend(self.client.futures_cancel_orders(
+                    symbol=symbol, orderIdList=json.dumps(chunk, separators=(',', ':'))
+                ))
+            return results
+        except Exception as e:
+            logger.error(f"Failed to batch cancel futures orders for {symbol}: {e}")
+            raise
+
+    @_retry()
     def get_open_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get all open orders"""
         try:
-            self._rate_limit()
-            result = self.client.get_open_orders(symbol=symbol)
-            # Ensure we return a list
-            if isinstance(result, list):
-                return result
-            else:
-                return [result] if result else []
+            self._rate_limit(REQUEST_WEIGHTS['open_orders_all'] if symbol is None else 1)
+            # Binance 此端點固定回傳 list
+            return self.client.get_open_orders(symbol=symbol) or []
         except Exception as e:
             logger.error(f"Failed to get open orders: {e}")
             raise
 
-    def get_order_status(self, symbol: str, order_id: str) -> Dict[str, Any]:
+    @_retry()
+    def get_order_status(self, symbol: str, order_id: Union[int, str]) -> Dict[str, Any]:
         """Get order status"""
         try:
             self._rate_limit()
-            return self.client.get_order(symbol=symbol, orderId=int(order_id))
+            return self.client.get_order(symbol=symbol, orderId=_as_order_id(order_id))
         except Exception as e:
             logger.error(f"Failed to get order status: {e}")
             raise
 
+    @_retry()
     def get_trades(self, symbol: str, limit: int = 500) -> List[Dict[str, Any]]:
         """Get account trade list"""
         try:
-            self._rate_limit()
-            result = self.client.get_my_trades(symbol=symbol, limit=limit)
-            # Ensure we return a list
-            if isinstance(result, list):
-                return result
-            else:
-                return [result] if result else []
+            self._rate_limit(REQUEST_WEIGHTS['my_trades'])
+            return self.client.get_my_trades(symbol=symbol, limit=limit) or []
         except Exception as e:
             logger.error(f"Failed to get trades: {e}")
             raise
@@ -279,57 +859,68 @@ class BinanceClient:
     def get_order_history(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get order history for all trading modes"""
         try:
-            if config.binance.paper_trading:
-                # Paper trading mode - return paper orders
-                if hasattr(self.client, 'paper_orders'):
-                    return self.client.paper_orders[-limit:] if self.client.paper_orders else []
-                else:
-                    return []
-            elif config.binance.demo_mode:
-                # Demo mode - return demo orders
-                if hasattr(self.client, 'demo_orders'):
-                    return getattr(self.client, 'demo_orders', [])[-limit:]
-                else:
-                    return []
-            else:
-                # Real trading mode - would get from database or API
-                return []
+            return self._get_order_history_impl(limit)
         except Exception as e:
             logger.error(f"Failed to get order history: {e}")
             return []
 
+    def _paper_order_history(self, limit: int) -> List[Dict[str, Any]]:
+        """Paper trading mode - return paper orders"""
+        return self.client.recent_orders(limit)
+
+    def _demo_order_history(self, limit: int) -> List[Dict[str, Any]]:
+        """Demo mode - return demo orders"""
+        return self.client.recent_orders(limit)
+
+    def _live_order_history(self, limit: int) -> List[Dict[str, Any]]:
+        """Real trading mode - would get from database or API"""
+        return []
+
     def filter_symbols_by_criteria(self, min_volume_24h: Optional[float] = None,
                                   max_symbols: Optional[int] = None) -> List[str]:
         """Filter symbols based on volume and other criteria"""
         try:
-            tickers = self.get_24hr_ticker()
-            filtered_symbols = []
+            # 白名單/黑名單只解析一次，避免迴圈內重複屬性查找
+            whitelist = self._whitelist
+            blacklist = self._blacklist
+            
+            # 白名單很小時只查詢白名單內的交易對，不必下載全市場 ticker
+            if whitelist and len(whitelist) <= WHITELIST_TICKER_BATCH_LIMIT:
+                tickers = self.get_24hr_tickers(sorted(whitelist))
+            else:
+                tickers = self.get_24hr_ticker()
             
             # Ensure tickers is a list
             if not isinstance(tickers, list):
                 tickers = [tickers] if tickers else []
             
+            # 過濾時同時保留成交量，排序不必再回頭查 ticker
+            candidates = []
             for ticker in tickers:
                 symbol = ticker.get('symbol', '')
                 volume_24h = float(ticker.get('quoteVolume', 0))
                 
                 # Apply whitelist/blacklist
-                if hasattr(config.trading, 'whitelist') and config.trading.whitelist and symbol not in config.trading.whitelist:
+                if whitelist and symbol not in whitelist:
                     continue
-                if hasattr(config.trading, 'blacklist') and config.trading.blacklist and symbol in config.trading.blacklist:
+                if symbol in blacklist:
                     continue
                 
                 # Apply volume filter
                 if min_volume_24h and volume_24h < min_volume_24h:
                     continue
                 
-                filtered_symbols.append(symbol)
+                candidates.append((symbol, volume_24h))
             
             # Sort by volume (descending) and limit results
             if min_volume_24h:
-                tickers_dict = {t['symbol']: float(t.get('quoteVolume', 0)) for t in tickers}
-                filtered_symbols.sort(key=lambda s: tickers_dict.get(s, 0), reverse=True)
+                if max_symbols:
+                    # 只需前 K 名時用 heap，免去完整排序
+                    candidates = heapq.nlargest(max_symbols, candidates, key=itemgetter(1))
+                else:
+                    candidates.sort(key=itemgetter(1), reverse=True)
             
+            filtered_symbols = [symbol for symbol, _ in candidates]
             if max_symbols:
                 filtered_symbols = filtered_symbols[:max_symbols]
             
@@ -343,7 +934,7 @@ class BinanceClient:
     def futures_change_margin_type(self, symbol: str, margin_type: str) -> Dict[str, Any]:
         """Change margin type for futures trading"""
         try:
-            if config.binance.demo_mode or config.binance.paper_trading:
+            if self._simulated:
                 logger.info(f"Simulated margin type change for {symbol} to {margin_type}")
                 return {"code": 200, "msg": "success"}
             
@@ -356,135 +947,190 @@ class BinanceClient:
     def get_symbol_info(self, symbol: str) -> Optional[Dict[str, Any]]:
         """Get symbol information from exchange info"""
         try:
-            if config.binance.demo_mode or config.binance.paper_trading:
+            if self._simulated:
                 # Return mock symbol info for demo/paper trading
-                return {
-                    "symbol": symbol,
-                    "status": "TRADING",
-                    "baseAsset": symbol[:-4] if len(symbol) > 4 else symbol[:3],
-                    "quoteAsset": symbol[-4:] if len(symbol) > 4 else symbol[3:],
-                    "filters": []
-                }
+                return _mock_symbol_info(symbol)
             
-            exchange_info = self.client.futures_exchange_info()
-            symbols = exchange_info.get('symbols', [])
-            
-            for symbol_info in symbols:
-                if symbol_info.get('symbol') == symbol:
-                    return symbol_info
-            return None
-        except Exception as e:
+            return self._exchange_info_snapshot().symbols.get(symbol)
+        except API_ERRORS as e:
             logger.error(f"Failed to get symbol info for {symbol}: {e}")
             return None
 
+    def _exchange_info_snapshot(self, ttl: float = EXCHANGE_INFO_TTL) -> _ExchangeInfoSnapshot:
+        """Get exchange info from the shared TTL cache, refreshing when expired"""
+        snapshot = _exchange_info_cache.get(self.trading_type)
+        if snapshot and self._time_monotonic() - snapshot.fetched_at < ttl:
+            return snapshot
+        
+        self._rate_limit(REQUEST_WEIGHTS['exchange_info'])
+        if self.trading_type == "futures" and not self._simulated:
+            info = self.client.futures_exchange_info()
+        else:
+            info = self.client.get_exchange_info()
+        snapshot = _exchange_info_cache[self.trading_type] = _ExchangeInfoSnapshot(info)
+        return snapshot
+
+    def get_exchange_info(self) -> Dict[str, Any]:
+        """Get exchange information (cached for EXCHANGE_INFO_TTL seconds)"""
+        return self._exchange_info_snapshot().info
+
+    def invalidate_exchange_info(self) -> None:
+        """Drop the cached exchange info so the next lookup refetches it"""
+        _exchange_info_cache.pop(self.trading_type, None)
+
+    @_retry()
     def get_mark_price(self, symbol: str) -> Dict[str, Any]:
         """Get mark price for futures symbol"""
         try:
-            if config.binance.demo_mode or config.binance.paper_trading:
+            if self._simulated:
                 # Return mock mark price for demo/paper trading
                 ticker = self.get_ticker_price(symbol)
                 price = float(ticker.get('price', 0)) if ticker else 0
                 return {"symbol": symbol, "markPrice": str(price)}
             
+            # 優先使用 WebSocket 推送的標記價格，免去每次 REST 往返
+            if self._mark_price_ws is None:
+                self._start_mark_price_stream()
+            streamed = self._mark_prices.get(symbol)
+            if streamed and self._time_monotonic() - streamed[0] < MARK_PRICE_STALE_AFTER:
+                return {"symbol": symbol, "markPrice": streamed[1]}
+            
             self._rate_limit()
             return self.client.futures_mark_price(symbol=symbol)
         except Exception as e:
             logger.error(f"Failed to get mark price for {symbol}: {e}")
             raise
 
+    def _start_mark_price_stream(self) -> None:
+        """Start the background all-market mark price WebSocket stream"""
+        if ThreadedWebsocketManager is None:
+            return
+        try:
+            # ThreadedWebsocketManager 在背景執行緒中維持一個常駐的 asyncio event loop
+            self._mark_price_ws = ThreadedWebsocketManager(testnet=config.binance.testnet)
+            self._mark_price_ws.start()
+            self._mark_price_ws.start_all_mark_price_socket(callback=self._handle_mark_price_message)
+            logger.info("Mark price WebSocket stream started")
+        except Exception as e:
+            logger.warning(f"Failed to start mark price stream, using REST: {e}")
+            self._mark_price_ws = False
+
+    def _handle_mark_price_message(self, msg: Any) -> None:
+        """Update the mark price cache from a !markPrice@arr stream message"""
+        if isinstance(msg, dict):
+            if msg.get('e') == 'error':
+                logger.warning(f"Mark price stream error: {msg.get('m')}")
+                return
+            msg = msg.get('data', ())
+        now = self._time_monotonic()
+        for update in msg:
+            self._mark_prices[update['s']] = (now, update['p'])
+
+    def stop_mark_price_stream(self) -> None:
+        """Stop the background mark price WebSocket stream"""
+        if self._mark_price_ws:
+            self._mark_price_ws.stop()
+        self._mark_price_ws = None
+        self._mark_prices.clear()
+
+    def _start_ticker_stream(self) -> None:
+        """Start the background all-market 24hr ticker WebSocket stream"""
+        if ThreadedWebsocketManager is None:
+            return
+        try:
+            self._ticker_ws = ThreadedWebsocketManager(testnet=config.binance.testnet)
+            self._ticker_ws.start()
+            self._ticker_ws.start_ticker_socket(callback=self._handle_ticker_message)
+            logger.info("24hr ticker WebSocket stream started")
+        except Exception as e:
+            logger.warning(f"Failed to start 24hr ticker stream, using REST: {e}")
+            self._ticker_ws = False
+
+    def _handle_ticker_message(self, msg: Any) -> None:
+        """Update the 24hr ticker cache from a !ticker@arr stream message"""
+        if isinstance(msg, dict):
+            if msg.get('e') == 'error':
+                logger.warning(f"24hr ticker stream error: {msg.get('m')}")
+                return
+            msg = msg.get('data', ())
+        tickers = self._tickers
+        for update in msg:
+            tickers[update['s']] = {field: update[key] for key, field in _TICKER_STREAM_FIELDS}
+        self._ticker_stream_at = self._time_monotonic()
+
+    def stop_ticker_stream(self) -> None:
+        """Stop the background 24hr ticker WebSocket stream"""
+        if self._ticker_ws:
+            self._ticker_ws.stop()
+        self._ticker_ws = None
+        self._tickers.clear()
+        self._tickers_seeded = False
+
     def get_funding_rate(self, symbol: str, limit: int = 100) -> List[Dict[str, Any]]:
         """Get funding rate history"""
         try:
-            if config.binance.demo_mode or config.binance.paper_trading:
+            if self._simulated:
                 # Return mock funding rate for demo/paper trading
-                return [{"symbol": symbol, "fundingRate": "0.0001", "fundingTime": int(time.time() * 1000)}]
+                return [{"symbol": symbol, "fundingRate": "0.0001", "fundingTime": time.time_ns() // 1_000_000}]
             
             self._rate_limit()
-            result = self.client.futures_funding_rate(symbol=symbol, limit=limit)
-            return result if isinstance(result, list) else [result]
-        except Exception as e:
+            return self.client.futures_funding_rate(symbol=symbol, limit=limit) or []
+        except API_ERRORS as e:
             logger.error(f"Failed to get funding rate for {symbol}: {e}")
             return []
 
+    @_retry()
     def get_futures_account(self) -> Dict[str, Any]:
         """Get futures account information"""
         try:
-            if config.binance.demo_mode or config.binance.paper_trading:
+            if self._simulated:
                 # Return mock futures account for demo/paper trading
-                return {
-                    "totalWalletBalance": "10000.00000000",
-                    "totalUnrealizedProfit": "0.00000000",
-                    "totalMarginBalance": "10000.00000000",
-                    "totalPositionInitialMargin": "0.00000000",
-                    "totalOpenOrderInitialMargin": "0.00000000",
-                    "maxWithdrawAmount": "10000.00000000",
-                    "assets": [
-                        {
-                            "asset": "USDT",
-                            "walletBalance": "10000.00000000",
-                            "unrealizedProfit": "0.00000000"
-                        }
-                    ]
-                }
+                # 淺拷貝模板，避免每次重建整個 dict
+                return dict(_FUTURES_ACCOUNT_MOCK)
             
-            self._rate_limit()
+            self._rate_limit(REQUEST_WEIGHTS['account'])
             return self.client.futures_account()
         except Exception as e:
             logger.error(f"Failed to get futures account: {e}")
             raise
 
+    def get_active_symbols(self, quote_assets: Union[str, tuple] = ('USDT',)) -> List[str]:
+        """Get symbols currently trading against the given quote assets"""
+        try:
+            if isinstance(quote_assets, str):
+                quote_assets = (quote_assets,)
+            return active_symbols(self._exchange_info_snapshot().syms, frozenset(quote_assets))
+        except API_ERRORS as e:
+            logger.error(f"Failed to get active symbols: {e}")
+            return []
+
     def get_all_symbols_info(self) -> List[Dict[str, Any]]:
         """Get information for all symbols"""
         try:
-            if config.binance.demo_mode or config.binance.paper_trading:
+            if self._simulated:
                 # Return mock symbols for demo/paper trading
-                mock_symbols = ["BTCUSDT", "ETHUSDT", "ADAUSDT", "BNBUSDT", "XRPUSDT"]
-                return [
-                    {
-                        "symbol": symbol,
-                        "status": "TRADING",
-                        "baseAsset": symbol[:-4] if len(symbol) > 4 else symbol[:3],
-                        "quoteAsset": symbol[-4:] if len(symbol) > 4 else symbol[3:],
-                        "filters": []
-                    }
-                    for symbol in mock_symbols
-                ]
+                return [dict(info) for info in _MOCK_SYMBOLS_INFO]
             
-            self._rate_limit()
-            exchange_info = self.client.futures_exchange_info()
-            return exchange_info.get('symbols', [])
-        except Exception as e:
+            return self.get_exchange_info().get('symbols', [])
+        except API_ERRORS as e:
             logger.error(f"Failed to get all symbols info: {e}")
             return []
 
     def get_futures_positions(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get futures positions"""
         try:
-            if config.binance.demo_mode or config.binance.paper_trading:
+            if self._simulated:
                 # Return mock positions for demo/paper trading
                 if symbol:
-                    return [{
-                        "symbol": symbol,
-                        "positionAmt": "0.000",
-                        "entryPrice": "0.0000",
-                        "markPrice": "0.0000",
-                        "unRealizedProfit": "0.0000",
-                        "liquidationPrice": "0",
-                        "leverage": "20",
-                        "maxNotionalValue": "1000000",
-                        "marginType": "cross",
-                        "isolatedMargin": "0.00000000",
-                        "isAutoAddMargin": "false",
-                        "positionSide": "BOTH",
-                        "notional": "0",
-                        "isolatedWallet": "0"
-                    }]
+                    position = dict(_FUTURES_POSITION_MOCK)
+                    position["symbol"] = symbol
+                    return [position]
                 else:
                     return []
             
-            self._rate_limit()
+            self._rate_limit(REQUEST_WEIGHTS['position_risk'])
             return self.client.futures_position_information(symbol=symbol)
-        except Exception as e:
+        except API_ERRORS as e:
             logger.error(f"Failed to get futures positions: {e}")
             return []
 
@@ -492,37 +1138,23 @@ class BinanceClient:
         """計算交易數量，基於持倉大小和當前價格"""
         try:
             # 獲取交易對資訊
-            exchange_info = self.get_exchange_info()
-            symbol_info = None
-            
-            for s in exchange_info.get('symbols', []):
-                if s.get('symbol') == symbol:
-                    symbol_info = s
-                    break
-            
-            if not symbol_info:
+            snapshot = self._exchange_info_snapshot()
+            if symbol not in snapshot.symbols:
                 logger.error(f"Symbol {symbol} not found in exchange info")
                 return 0.0
             
-            # 獲取最小數量限制
-            min_qty = 0.0
-            step_size = 0.0
-            
-            for filter_item in symbol_info.get('filters', []):
-                if filter_item.get('filterType') == 'LOT_SIZE':
-                    min_qty = float(filter_item.get('minQty', 0))
-                    step_size = float(filter_item.get('stepSize', 0))
-                    break
+            # 獲取最小數量限制（快取時已轉為 Decimal）
+            step_size, min_qty = snapshot.lot_sizes.get(symbol, (_DECIMAL_ZERO, _DECIMAL_ZERO))
             
             # 計算基礎數量（基於持倉大小的USD價值）
             if current_price > 0:
-                base_quantity = position_size / current_price
+                base_quantity = Decimal(position_size) / Decimal(current_price)
             else:
                 return 0.0
             
-            # 調整到符合步長要求
+            # 以 Decimal 向下取整到步長，避免浮點誤差導致 LOT_SIZE 被拒
             if step_size > 0:
-                quantity = round(base_quantity / step_size) * step_size
+                quantity = (base_quantity / step_size).to_integral_value(rounding=ROUND_DOWN) * step_size
             else:
                 quantity = base_quantity
             
@@ -530,12 +1162,165 @@ class BinanceClient:
             if quantity < min_qty:
                 quantity = min_qty
             
-            return quantity
+            return float(quantity)
             
         except Exception as e:
             logger.error(f"Failed to calculate quantity for {symbol}: {e}")
             return 0.0
 
+
+class AsyncBinanceClient:
+    """Async Binance client for concurrent multi-symbol requests"""
+    
+    def __init__(self, trading_type: str = "futures", max_concurrency: int = ASYNC_MAX_CONCURRENCY):
+        self.trading_type = trading_type.lower()
+        self.client = None
+        # Demo / 紙上交易模式沒有真實的非同步連線，改為在執行緒中呼叫同步客戶端
+        self._sync_client: Optional[BinanceClient] = None
+        # 公開行情用的 httpx 連線（未安裝 httpx 時為 None，改用 AsyncClient）
+        self._http = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def __aenter__(self) -> "AsyncBinanceClient":
+        await self.connect()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+    
+    async def connect(self) -> None:
+        """Open the underlying aiohttp session (one per client, reused for all calls)"""
+        if config.binance.demo_mode or config.binance.paper_trading:
+            self._sync_client = get_client(self.trading_type)
+            return
+        
+        if AsyncClient is None:
+            raise ImportError("python-binance package is required. Install with: pip install python-binance")
+        
+        api_key, secret_key = config.binance.get_api_credentials(self.trading_type)
+        if not api_key or not secret_key:
+            raise ValueError(f"Missing API credentials for {self.trading_type} trading")
+        
+        self.client = await AsyncClient.create(api_key, secret_key, testnet=config.binance.testnet)
+        self.client._handle_response = _fast_handle_response_async
+        if HTTPX_AVAILABLE:
+            self._http = httpx.AsyncClient(
+                base_url=SPOT_TESTNET_REST_URL if config.binance.testnet else SPOT_REST_URL,
+                http2=HTTP2_AVAILABLE,
+                timeout=10,
+                limits=httpx.Limits(max_keepalive_connections=HTTPX_MAX_KEEPALIVE,
+                                    max_connections=HTTPX_MAX_CONNECTIONS)
+            )
+        logger.info(f"Initialized async Binance client for {self.trading_type} trading (testnet: {config.binance.testnet})")
+    
+    async def close(self) -> None:
+        """Close the underlying aiohttp session"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        if self.client is not None:
+            await self.client.close_connection()
+            self.client = None
+    
+    async def _call(self, method: str, weight: int = 1, **kwargs) -> Any:
+        """Run an API call with bounded concurrency"""
+        async with self._semaphore:
+            # 與同步客戶端共用權重預算；紙上交易時直接呼叫底層客戶端，同樣需先扣除
+            await get_request_bucket().acquire_async(weight)
+            if self._sync_client is not None:
+                return await asyncio.to_thread(getattr(self._sync_client.client, method), **kwargs)
+            return await getattr(self.client, method)(**kwargs)
+    
+    async def _public_get(self, path: str, weight: int = 1, **params) -> Any:
+        """GET an unsigned market-data endpoint over the shared httpx connection"""
+        async with self._semaphore:
+            await get_request_bucket().acquire_async(weight)
+            response = await self._http.get(path, params=params)
+        _sync_used_weight(response)
+        if not (200 <= response.status_code < 300):
+            raise BinanceAPIException(response, response.status_code, response.text)
+        return _json_loads(response.content)
+    
+    async def get_account_info(self) -> Dict[str, Any]:
+        """Get account information"""
+        try:
+            return await self._call('get_account', weight=REQUEST_WEIGHTS['account'])
+        except Exception as e:
+            logger.error(f"Failed to get account info: {e}")
+            raise
+    
+    @_retry_async()
+    async def get_klines(self, symbol: str, interval: str, limit: int = 500,
+                         start_time: Union[int, datetime, None] = None,
+                         end_time: Union[int, datetime, None] = None) -> List[List[str]]:
+        """Get kline/candlestick data"""
+        try:
+            kwargs = {
+                'symbol': symbol,
+                'interval': interval,
+                'limit': limit
+            }
+            if start_time:
+                kwargs['startTime'] = _to_ms(start_time)
+            if end_time:
+                kwargs['endTime'] = _to_ms(end_time)
+            
+            if self._http is not None:
+                return await self._public_get('/api/v3/klines', weight=klines_weight(limit), **kwargs)
+            return await self._call('get_klines', weight=klines_weight(limit), **kwargs)
+        except Exception as e:
+            logger.error(f"Failed to get klines for {symbol}: {e}")
+            raise
+    
+    async def get_klines_many(self, symbols: List[str], interval: str,
+                              limit: int = 500) -> Dict[str, List[List[str]]]:
+        """Get klines for many symbols concurrently; failed symbols are omitted"""
+        results = await asyncio.gather(
+            *(self.get_klines(symbol, interval, limit=limit) for symbol in symbols),
+            return_exceptions=True
+        )
+        return {
+            symbol: klines
+            for symbol, klines in zip(symbols, results)
+            if not isinstance(klines, BaseException)
+        }
+    
+    @_retry_async()
+    async def get_24hr_ticker(self, symbol: Optional[str] = None) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """Get 24hr ticker statistics"""
+        try:
+            if self._http is not None:
+                if symbol:
+                    return await self._public_get('/api/v3/ticker/24hr', weight=REQUEST_WEIGHTS['ticker_24hr'], symbol=symbol)
+                return await self._public_get('/api/v3/ticker/24hr', weight=REQUEST_WEIGHTS['ticker_24hr_all'])
+            if symbol:
+                return await self._call('get_ticker', weight=REQUEST_WEIGHTS['ticker_24hr'], symbol=symbol)
+            return await self._call('get_ticker', weight=REQUEST_WEIGHTS['ticker_24hr_all'])
+        except Exception as e:
+            logger.error(f"Failed to get 24hr ticker: {e}")
+            raise
+    
+    async def get_symbol_info(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Get symbol information from exchange info"""
+        try:
+            if self._sync_client is not None:
+                return await asyncio.to_thread(self._sync_client.get_symbol_info, symbol)
+            
+            snapshot = _exchange_info_cache.get(self.trading_type)
+            if not snapshot or time.monotonic() - snapshot.fetched_at >= EXCHANGE_INFO_TTL:
+                async with self._semaphore:
+                    await get_request_bucket().acquire_async(REQUEST_WEIGHTS['exchange_info'])
+                    if self.trading_type == "futures":
+                        info = await self.client.futures_exchange_info()
+                    else:
+                        info = await self.client.get_exchange_info()
+                snapshot = _exchange_info_cache[self.trading_type] = _ExchangeInfoSnapshot(info)
+            return snapshot.symbols.get(symbol)
+        except API_ERRORS as e:
+            logger.error(f"Failed to get symbol info for {symbol}: {e}")
+            return None
+
+
 # Create global instance for backwards compatibility
 # This will be initialized when first imported
 try:
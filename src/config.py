@@ -1,8 +1,11 @@
 """
 Configuration management for the Binance trading bot
 """
-import os
-from typing import List, Optional
+from functools import cache, cached_property
+from typing import Annotated, FrozenSet, Optional
+
+from pydantic import Field, field_validator, model_validator
+from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
 
 # Try to load environment variables from .env file
 try:
@@ -13,41 +16,64 @@ except ImportError:
     pass
 
 
-class BinanceConfig:
+# 各設定區塊共用：環境變數名稱不分大小寫，忽略不相關的變數
+_SETTINGS_CONFIG = SettingsConfigDict(env_prefix="", case_sensitive=False, extra="ignore")
+
+
+# Binance 預設的每分鐘請求權重上限（以 IP 計算，現貨與 USDⓈ-M 合約分開計算）
+WEIGHT_LIMITS_1M = {"spot": 6000, "futures": 2400}
+
+
+class BinanceConfig(BaseSettings):
     """Binance API configuration with support for separate spot and futures keys"""
     
-    def __init__(self):
-        # 現貨交易 API 金鑰
-        self.spot_api_key: str = os.getenv("BINANCE_SPOT_API_KEY", "")
-        self.spot_secret_key: str = os.getenv("BINANCE_SPOT_SECRET_KEY", "")
-        
-        # 合約交易 API 金鑰
-        self.futures_api_key: str = os.getenv("BINANCE_FUTURES_API_KEY", "")
-        self.futures_secret_key: str = os.getenv("BINANCE_FUTURES_SECRET_KEY", "")
-        
-        # 向後兼容：如果沒有設定分別的金鑰，使用通用金鑰
-        fallback_api_key = os.getenv("BINANCE_API_KEY", "")
-        fallback_secret_key = os.getenv("BINANCE_SECRET_KEY", "")
-        
-        if not self.spot_api_key and fallback_api_key:
-            self.spot_api_key = fallback_api_key
-        if not self.spot_secret_key and fallback_secret_key:
-            self.spot_secret_key = fallback_secret_key
+    model_config = _SETTINGS_CONFIG
+    
+    # 現貨交易 API 金鑰
+    spot_api_key: str = Field("", validation_alias="BINANCE_SPOT_API_KEY")
+    spot_secret_key: str = Field("", validation_alias="BINANCE_SPOT_SECRET_KEY")
+    
+    # 合約交易 API 金鑰
+    futures_api_key: str = Field("", validation_alias="BINANCE_FUTURES_API_KEY")
+    futures_secret_key: str = Field("", validation_alias="BINANCE_FUTURES_SECRET_KEY")
+    
+    # 向後兼容：如果沒有設定分別的金鑰，使用通用金鑰
+    fallback_api_key: str = Field("", validation_alias="BINANCE_API_KEY")
+    fallback_secret_key: str = Field("", validation_alias="BINANCE_SECRET_KEY")
+    
+    # 其他設定
+    testnet: bool = Field(False, validation_alias="BINANCE_TESTNET")
+    demo_mode: bool = Field(False, validation_alias="DEMO_MODE")
+    paper_trading: bool = Field(False, validation_alias="PAPER_TRADING")
+    base_url: Optional[str] = Field(None, validation_alias="BINANCE_BASE_URL")
+    trading_mode: str = Field("futures", validation_alias="TRADING_MODE")  # spot, futures, both
+    
+    # 時間同步設定
+    time_offset: int = Field(0, validation_alias="BINANCE_TIME_OFFSET")
+    
+    # 請求權重限流（token bucket）：可瞬間消耗的權重上限與每秒回補量
+    rate_limit_capacity: float = Field(100, validation_alias="BINANCE_RATE_LIMIT_CAPACITY")
+    rate_limit_per_second: float = Field(20, validation_alias="BINANCE_RATE_LIMIT_PER_SECOND")
+    # 每分鐘權重上限，與回應標頭 X-MBX-USED-WEIGHT-1M 比對剩餘額度；未設定時依交易類型使用 WEIGHT_LIMITS_1M
+    weight_limit_per_minute: Optional[int] = Field(None, validation_alias="BINANCE_WEIGHT_LIMIT_1M")
+    
+    @field_validator("trading_mode")
+    @classmethod
+    def _lower_trading_mode(cls, v: str) -> str:
+        return v.lower()
+    
+    @model_validator(mode="after")
+    def _apply_fallback_keys(self) -> "BinanceConfig":
+        if not self.spot_api_key and self.fallback_api_key:
+            self.spot_api_key = self.fallback_api_key
+        if not self.spot_secret_key and self.fallback_secret_key:
+            self.spot_secret_key = self.fallback_secret_key
             
-        if not self.futures_api_key and fallback_api_key:
-            self.futures_api_key = fallback_api_key
-        if not self.futures_secret_key and fallback_secret_key:
-            self.futures_secret_key = fallback_secret_key
-        
-        # 其他設定
-        self.testnet: bool = os.getenv("BINANCE_TESTNET", "false").lower() == "true"
-        self.demo_mode: bool = os.getenv("DEMO_MODE", "false").lower() == "true"
-        self.paper_trading: bool = os.getenv("PAPER_TRADING", "false").lower() == "true"
-        self.base_url: Optional[str] = os.getenv("BINANCE_BASE_URL")
-        self.trading_mode: str = os.getenv("TRADING_MODE", "futures").lower()  # spot, futures, both
-        
-        # 時間同步設定
-        self.time_offset: int = int(os.getenv("BINANCE_TIME_OFFSET", "0"))
+        if not self.futures_api_key and self.fallback_api_key:
+            self.futures_api_key = self.fallback_api_key
+        if not self.futures_secret_key and self.fallback_secret_key:
+            self.futures_secret_key = self.fallback_secret_key
+        return self
         
     def get_api_credentials(self, trading_type: str = "futures"):
         """獲取指定交易類型的 API 憑證"""
@@ -58,6 +84,12 @@ class BinanceConfig:
         else:
             raise ValueError(f"Unsupported trading type: {trading_type}")
     
+    def get_weight_limit(self, trading_type: str = "futures") -> int:
+        """獲取指定交易類型的每分鐘請求權重上限"""
+        if self.weight_limit_per_minute:
+            return self.weight_limit_per_minute
+        return WEIGHT_LIMITS_1M[trading_type.lower()]
+    
     def has_valid_credentials(self, trading_type: str = "futures") -> bool:
         """檢查指定交易類型是否有有效的憑證"""
         api_key, secret_key = self.get_api_credentials(trading_type)
@@ -74,68 +106,79 @@ class BinanceConfig:
         return self.futures_secret_key if self.futures_secret_key else self.spot_secret_key
 
 
-class DatabaseConfig:
+class DatabaseConfig(BaseSettings):
     """Database configuration"""
     
-    def __init__(self):
-        self.url: str = os.getenv("DATABASE_URL", "sqlite:///trading_bot.db")
-        self.echo: bool = os.getenv("DATABASE_ECHO", "false").lower() == "true"
+    model_config = _SETTINGS_CONFIG
+    
+    url: str = Field("sqlite:///trading_bot.db", validation_alias="DATABASE_URL")
+    echo: bool = Field(False, validation_alias="DATABASE_ECHO")
 
 
-class RedisConfig:
+class RedisConfig(BaseSettings):
     """Redis configuration"""
     
-    def __init__(self):
-        self.host: str = os.getenv("REDIS_HOST", "localhost")
-        self.port: int = int(os.getenv("REDIS_PORT", "6379"))
-        self.db: int = int(os.getenv("REDIS_DB", "0"))
-        self.password: Optional[str] = os.getenv("REDIS_PASSWORD")
+    model_config = _SETTINGS_CONFIG
+    
+    host: str = Field("localhost", validation_alias="REDIS_HOST")
+    port: int = Field(6379, validation_alias="REDIS_PORT")
+    db: int = Field(0, validation_alias="REDIS_DB")
+    password: Optional[str] = Field(None, validation_alias="REDIS_PASSWORD")
 
 
-class TradingConfig:
+class TradingConfig(BaseSettings):
     """Trading configuration"""
     
-    def __init__(self):
-        self.base_currency: str = os.getenv("BASE_CURRENCY", "USDT")
-        self.max_positions: int = int(os.getenv("MAX_POSITIONS", "10"))
-        self.position_size_pct: float = float(os.getenv("POSITION_SIZE_PCT", "0.1"))  # 10% of balance per trade
-        self.stop_loss_pct: float = float(os.getenv("STOP_LOSS_PCT", "0.05"))  # 5% stop loss
-        self.take_profit_pct: float = float(os.getenv("TAKE_PROFIT_PCT", "0.15"))  # 15% take profit
-        self.min_volume_24h: float = float(os.getenv("MIN_VOLUME_24H", "1000000"))  # Minimum 24h volume in USDT
-        
-        # Symbol filtering
-        whitelist_str = os.getenv("WHITELIST", "")
-        self.whitelist: List[str] = [s.strip() for s in whitelist_str.split(",") if s.strip()] if whitelist_str else []
-        
-        blacklist_str = os.getenv("BLACKLIST", "")
-        self.blacklist: List[str] = [s.strip() for s in blacklist_str.split(",") if s.strip()] if blacklist_str else []
-          # Risk management
-        self.max_daily_loss_pct: float = float(os.getenv("MAX_DAILY_LOSS_PCT", "0.10"))  # 10% max daily loss
-        self.max_drawdown_pct: float = float(os.getenv("MAX_DRAWDOWN_PCT", "0.20"))  # 20% max drawdown
-        
-        # Trading costs
-        self.commission_rate: float = float(os.getenv("COMMISSION_RATE", "0.001"))  # 0.1% commission
-        
-        # 合約交易設定
-        self.futures_enabled: bool = os.getenv("FUTURES_ENABLED", "false").lower() == "true"
-        self.default_leverage: int = int(os.getenv("DEFAULT_LEVERAGE", "10"))
-        self.max_leverage: int = int(os.getenv("MAX_LEVERAGE", "20"))
-        self.margin_type: str = os.getenv("MARGIN_TYPE", "CROSSED")  # CROSSED or ISOLATED
-        self.futures_commission_rate: float = float(os.getenv("FUTURES_COMMISSION_RATE", "0.0004"))  # 0.04% for futures
-        
-        # 合約風險管理
-        self.futures_max_position_size_pct: float = float(os.getenv("FUTURES_MAX_POSITION_SIZE_PCT", "0.05"))  # 5% of balance per position
-        self.futures_stop_loss_pct: float = float(os.getenv("FUTURES_STOP_LOSS_PCT", "0.03"))  # 3% stop loss
-        self.futures_take_profit_pct: float = float(os.getenv("FUTURES_TAKE_PROFIT_PCT", "0.06"))  # 6% take profit
+    model_config = _SETTINGS_CONFIG
+    
+    base_currency: str = "USDT"
+    max_positions: int = 10
+    position_size_pct: float = 0.1  # 10% of balance per trade
+    stop_loss_pct: float = 0.05  # 5% stop loss
+    take_profit_pct: float = 0.15  # 15% take profit
+    min_volume_24h: float = 1000000  # Minimum 24h volume in USDT
+    
+    # Symbol filtering（逗號分隔字串，不經 JSON 解碼；存為 frozenset 以 O(1) 判斷成員）
+    whitelist: Annotated[FrozenSet[str], NoDecode] = Field(default_factory=frozenset)
+    blacklist: Annotated[FrozenSet[str], NoDecode] = Field(default_factory=frozenset)
+    
+    # Risk management
+    max_daily_loss_pct: float = 0.10  # 10% max daily loss
+    max_drawdown_pct: float = 0.20  # 20% max drawdown
+    
+    # Trading costs
+    commission_rate: float = 0.001  # 0.1% commission
+    
+    # 合約交易設定
+    futures_enabled: bool = False
+    default_leverage: int = 10
+    max_leverage: int = 20
+    margin_type: str = "CROSSED"  # CROSSED or ISOLATED
+    futures_commission_rate: float = 0.0004  # 0.04% for futures
+    
+    # 合約風險管理
+    futures_max_position_size_pct: float = 0.05  # 5% of balance per position
+    futures_stop_loss_pct: float = 0.03  # 3% stop loss
+    futures_take_profit_pct: float = 0.06  # 6% take profit
+    
+    @field_validator("whitelist", "blacklist", mode="before")
+    @classmethod
+    def _split_symbols(cls, v):
+        if isinstance(v, str):
+            return frozenset(s.strip() for s in v.split(",") if s.strip())
+        return v
 
 
-class NotificationConfig:
+class NotificationConfig(BaseSettings):
     """Notification configuration"""
     
-    def __init__(self):
-        self.telegram_bot_token: Optional[str] = os.getenv("TELEGRAM_BOT_TOKEN")
-        self.telegram_chat_id: Optional[str] = os.getenv("TELEGRAM_CHAT_ID")
-        self.discord_webhook: Optional[str] = os.getenv("DISCORD_WEBHOOK")
+    model_config = _SETTINGS_CONFIG
+    
+    telegram_bot_token: Optional[str] = None
+    telegram_chat_id: Optional[str] = None
+    discord_webhook: Optional[str] = None
+    # 通知合併等待秒數：連續通知在此時間內合併成一則訊息送出
+    notification_flush_delay: float = 0.1
 
 
 class Config:
@@ -143,10 +186,20 @@ class Config:
     
     def __init__(self):
         self.binance = BinanceConfig()
-        self.database = DatabaseConfig()
-        self.redis = RedisConfig()
         self.trading = TradingConfig()
-        self.notifications = NotificationConfig()
+    
+    # 資料庫、Redis 與通知設定在首次存取時才解析，未使用的模式不需讀取其環境變數
+    @cached_property
+    def database(self) -> DatabaseConfig:
+        return DatabaseConfig()
+    
+    @cached_property
+    def redis(self) -> RedisConfig:
+        return RedisConfig()
+    
+    @cached_property
+    def notifications(self) -> NotificationConfig:
+        return NotificationConfig()
         
     @property
     def is_testnet(self) -> bool:
@@ -157,5 +210,14 @@ class Config:
         return self.binance.demo_mode
 
 
-# Global config instance
-config = Config()
+@cache
+def get_config() -> Config:
+    """Get the process-wide config instance, created on first use"""
+    return Config()
+
+
+def __getattr__(name: str):
+    # Global config instance：`from .config import config` 首次存取時才解析環境變數
+    if name == "config":
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,9 +3,14 @@ Data manager for handling market data collection and storage
 """
 
 import asyncio
+import csv
+import io
 from datetime import datetime, timedelta
-from typing import List, Optional
+from functools import cache
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 import pandas as pd
+from sqlalchemy import bindparam, delete, func, select, text
 from sqlalchemy.orm import Session
 
 try:
@@ -16,70 +21,245 @@ except ImportError:
     logger = logging.getLogger(__name__)
 
 from .config import config
-from .binance_client import binance_client
+from .binance_client import binance_client, AsyncBinanceClient
+from .ttl_cache import TTLCache
 from .database.models import MarketData, Symbol, get_session_factory
 
 
+# 單一 INSERT 語句最多寫入的 K 線筆數（每筆 11 個綁定參數，需低於 SQLite 的變數上限）
+UPSERT_BATCH_SIZE = 500
+
+# 批次收集時同時進行的 K 線請求數（實際速率仍由共用的權重 token bucket 控制）
+BULK_COLLECT_CONCURRENCY = 10
+
+# 讀取 K 線時每次從伺服器端游標取回的筆數
+MARKET_DATA_FETCH_SIZE = 10_000
+
+# get_market_data 結果快取：回測與訊號迴圈常重複查詢相同區間；寫入時依 (symbol, timeframe) 失效
+MARKET_DATA_CACHE_SIZE = 256
+MARKET_DATA_CACHE_TTL = 60
+MARKET_DATA_CACHE_TTL_DAILY = 600
+
+# 清理舊資料時每個交易刪除的筆數，避免長時間持有寫入鎖
+CLEANUP_BATCH_SIZE = 10_000
+
+# upsert 衝突時更新的欄位
+_MARKET_DATA_KEY = ("symbol", "timeframe", "open_time")
+_MARKET_DATA_UPDATE_COLUMNS = (
+    "close_time", "open_price", "high_price", "low_price", "close_price",
+    "volume", "quote_volume", "trades_count",
+)
+
+
+def _kline_rows(symbol: str, timeframe: str, klines: List[List]) -> List[dict]:
+    """Convert Binance klines into market_data row dicts"""
+    # 每個欄位以 NumPy 一次轉型，取代逐筆逐欄的 float()/int() 呼叫
+    # 以 UTC 儲存（不經本地時區轉換），與新鮮度判斷使用的 datetime.utcnow() 一致
+    # 先建立一次物件陣列，再以欄位切片轉型，不再為每個欄位各跑一次 Python 迴圈
+    arr = np.asarray(klines, dtype=object)
+    times = arr[:, [0, 6]].astype(np.int64).astype("datetime64[ms]")
+    values = arr[:, 1:8].astype(np.float64)
+    trades = arr[:, 8].astype(np.int64)
+
+    # tolist() 轉回 Python datetime/float/int，資料庫驅動無法直接綁定 NumPy 純量
+    return [
+        {
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "open_time": open_time,
+            "close_time": close_time,
+            "open_price": open_price,
+            "high_price": high_price,
+            "low_price": low_price,
+            "close_price": close_price,
+            "volume": volume,
+            "quote_volume": quote_volume,
+            "trades_count": trades_count,
+        }
+        for (open_time, close_time), (open_price, high_price, low_price, close_price, volume, _, quote_volume), trades_count
+        in zip(times.tolist(), values.tolist(), trades.tolist())
+    ]
+
+
+# 重複使用的查詢在模組載入時建立一次，呼叫時只綁定參數，不必每次重建語句樹
+_LATEST_TS_STMT = select(func.max(MarketData.open_time)).where(
+    MarketData.symbol == bindparam("symbol"), MarketData.timeframe == bindparam("timeframe")
+)
+# 只查詢需要的欄位，不建立 ORM 物件
+_MARKET_DATA_STMT = (
+    select(
+        MarketData.open_time.label("timestamp"),
+        MarketData.open_price.label("open"),
+        MarketData.high_price.label("high"),
+        MarketData.low_price.label("low"),
+        MarketData.close_price.label("close"),
+        MarketData.volume,
+        MarketData.quote_volume,
+        MarketData.trades_count,
+    )
+    .where(MarketData.symbol == bindparam("symbol"), MarketData.timeframe == bindparam("timeframe"))
+    .order_by(MarketData.open_time)
+)
+
+
+_PRICE_COLUMNS = ["open", "high", "low", "close"]
+
+
+def to_price_ticks(df: pd.DataFrame, tick_size: float) -> pd.DataFrame:
+    """Convert the OHLC columns of a get_market_data frame into int64 multiples of tick_size"""
+    ticks = df.copy()
+    # 直接除以 tick_size：以 round(1 / tick_size) 相乘在 tick_size 不是 1/整數（如 0.3）時會得到錯誤的刻度
+    ticks[_PRICE_COLUMNS] = np.rint(df[_PRICE_COLUMNS].to_numpy(dtype=np.float64) / tick_size).astype(np.int64)
+    return ticks
+
+
+def _market_data_cache_ttl(timeframe: str) -> float:
+    """Cache TTL for get_market_data results; daily and longer candles change slowly"""
+    return MARKET_DATA_CACHE_TTL_DAILY if timeframe[-1:] in ("d", "w", "M") else MARKET_DATA_CACHE_TTL
+
+
 class DataManager:
     """Manages market data collection, storage and retrieval"""
-
+    
     def __init__(self):
         self.session_factory = get_session_factory(config.database.url)
         self.timeframes = {"1m": "1m", "5m": "5m", "15m": "15m", "1h": "1h", "4h": "4h", "1d": "1d"}
-
+        self._market_data_cache = TTLCache(MARKET_DATA_CACHE_SIZE)
+        # 每次寫入遞增版本號，舊版本的快取項目不再命中，之後由 LRU 淘汰
+        self._market_data_versions: Dict[Tuple[str, str], int] = {}
+        # 交易迴圈共用的非同步客戶端，首次使用時在當前事件迴圈中連線，由 aclose() 關閉
+        self._async_client: Optional[AsyncBinanceClient] = None
+        self._async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+        
     def get_session(self) -> Session:
         """Get database session"""
         return self.session_factory()
 
+    def _invalidate_market_data(self, symbol: str, timeframe: str) -> None:
+        """Drop cached get_market_data results for a symbol/timeframe after a write"""
+        key = (symbol, timeframe)
+        self._market_data_versions[key] = self._market_data_versions.get(key, 0) + 1
+
+    def _upsert_market_data(self, session: Session, rows: List[dict], update: bool = True) -> None:
+        """Insert market data rows with the dialect's native upsert; existing rows are
+        updated, or left untouched when update is False"""
+        dialect = session.get_bind().dialect.name
+        if dialect == "mysql":
+            from sqlalchemy.dialects.mysql import insert
+
+            for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+                stmt = insert(MarketData).values(rows[start:start + UPSERT_BATCH_SIZE])
+                if update:
+                    # MySQL 沒有 ON CONFLICT，以 ON DUPLICATE KEY UPDATE 命中同一個唯一索引
+                    stmt = stmt.on_duplicate_key_update(
+                        {name: stmt.inserted[name] for name in _MARKET_DATA_UPDATE_COLUMNS}
+                    )
+                else:
+                    stmt = stmt.prefix_with("IGNORE")
+                session.execute(stmt)
+            return
+
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            stmt = insert(MarketData).values(rows[start:start + UPSERT_BATCH_SIZE])
+            if update:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=list(_MARKET_DATA_KEY),
+                    set_={name: stmt.excluded[name] for name in _MARKET_DATA_UPDATE_COLUMNS},
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=list(_MARKET_DATA_KEY))
+            session.execute(stmt)
+        
+    def _copy_market_data(self, session: Session, rows: List[dict]) -> None:
+        """Bulk-load new market data rows with PostgreSQL COPY FROM STDIN"""
+        columns = _MARKET_DATA_KEY + _MARKET_DATA_UPDATE_COLUMNS
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for row in rows:
+            writer.writerow([row[name] for name in columns])
+        buf.seek(0)
+
+        cursor = session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {MarketData.__tablename__} ({', '.join(columns)}) FROM STDIN WITH CSV", buf
+            )
+        finally:
+            cursor.close()
+
     def update_symbol_info(self) -> None:
         """Update symbol information in database"""
         try:
             logger.info("Updating symbol information...")
-            symbols_info = binance_client.get_symbol_info()
+            symbols_info = binance_client.get_all_symbols_info()
 
             # Ensure symbols_info is a list
             if not isinstance(symbols_info, list):
                 symbols_info = [symbols_info] if symbols_info else []
 
-            with self.get_session() as session:
-                for symbol_data in symbols_info:
-                    if symbol_data.get("status") != "TRADING":
-                        continue
+            # 在開啟 session 前篩出需要寫入的交易對
+            tradable = [
+                s for s in symbols_info if s.get("status") == "TRADING" and s.get("symbol")
+            ]
 
-                    # Get or create symbol
-                    symbol_name = symbol_data.get("symbol")
-                    if not symbol_name:
-                        continue
+            now = datetime.utcnow()
+            with self.get_session() as session:
+                # 一次載入所有已知交易對的 id，取代逐一查詢是否存在
+                existing = dict(session.query(Symbol.symbol, Symbol.id).all())
+                new_rows: List[dict] = []
+                upd_rows: List[dict] = []
 
-                    symbol = session.query(Symbol).filter_by(symbol=symbol_name).first()
+                for symbol_data in tradable:
+                    symbol_name = symbol_data["symbol"]
+                    symbol_id = existing.get(symbol_name)
 
-                    if symbol:
+                    if symbol_id is not None:
                         # Update existing symbol
-                        symbol.status = symbol_data.get("status", "UNKNOWN")
-                    else:
+                        upd_rows.append({
+                            "id": symbol_id,
+                            "status": symbol_data.get("status", "UNKNOWN"),
+                            "updated_at": now,
+                        })
+                    elif symbol_name not in existing:
                         # Create new symbol
                         filters = {f["filterType"]: f for f in symbol_data.get("filters", [])}
-
-                        symbol = Symbol(
-                            symbol=symbol_name,
-                            base_asset=symbol_data.get("baseAsset", ""),
-                            quote_asset=symbol_data.get("quoteAsset", ""),
-                            status=symbol_data.get("status", "UNKNOWN"),
-                            is_active=symbol_data.get("status") == "TRADING",
-                            min_qty=float(filters.get("LOT_SIZE", {}).get("minQty", 0)),
-                            max_qty=float(filters.get("LOT_SIZE", {}).get("maxQty", 0)),
-                            step_size=float(filters.get("LOT_SIZE", {}).get("stepSize", 0)),
-                            min_price=float(filters.get("PRICE_FILTER", {}).get("minPrice", 0)),
-                            max_price=float(filters.get("PRICE_FILTER", {}).get("maxPrice", 0)),
-                            tick_size=float(filters.get("PRICE_FILTER", {}).get("tickSize", 0)),
-                            min_notional=float(
+                        lot_size = filters.get("LOT_SIZE", {})
+                        price_filter = filters.get("PRICE_FILTER", {})
+
+                        new_rows.append({
+                            "symbol": symbol_name,
+                            "base_asset": symbol_data.get("baseAsset", ""),
+                            "quote_asset": symbol_data.get("quoteAsset", ""),
+                            "status": symbol_data.get("status", "UNKNOWN"),
+                            "is_active": symbol_data.get("status") == "TRADING",
+                            "min_qty": float(lot_size.get("minQty", 0)),
+                            "max_qty": float(lot_size.get("maxQty", 0)),
+                            "step_size": float(lot_size.get("stepSize", 0)),
+                            "min_price": float(price_filter.get("minPrice", 0)),
+                            "max_price": float(price_filter.get("maxPrice", 0)),
+                            "tick_size": float(price_filter.get("tickSize", 0)),
+                            "min_notional": float(
                                 filters.get("MIN_NOTIONAL", {}).get("minNotional", 0)
                             ),
-                        )
-                        session.add(symbol)
-
+                            "created_at": now,
+                            "updated_at": now,
+                        })
+                        # 同一批回應中重複出現的交易對只新增一次
+                        existing[symbol_name] = None
+
+                # 以 executemany 批次寫入，不經 ORM 的逐物件 unit-of-work flush
+                if new_rows:
+                    session.bulk_insert_mappings(Symbol, new_rows)
+                if upd_rows:
+                    session.bulk_update_mappings(Symbol, upd_rows)
                 session.commit()
-                logger.info(f"Updated {len(symbols_info)} symbols")
+
+            logger.info(f"Updated {len(symbols_info)} symbols")
 
         except Exception as e:
             logger.error(f"Failed to update symbol info: {e}")
@@ -103,53 +283,16 @@ class DataManager:
                 logger.warning(f"No data received for {symbol} {timeframe}")
                 return False
 
+            # 先在 session 外完成解析，連線只在 upsert 期間持有
+            rows = _kline_rows(symbol, timeframe, klines)
             with self.get_session() as session:
-                for kline in klines:
-                    # Parse kline data
-                    timestamp = datetime.fromtimestamp(int(kline[0]) / 1000)
-                    open_price = float(kline[1])
-                    high_price = float(kline[2])
-                    low_price = float(kline[3])
-                    close_price = float(kline[4])
-                    volume = float(kline[5])
-                    quote_volume = float(kline[7])
-                    trades_count = int(kline[8])
-
-                    # Check if data already exists
-                    existing = (
-                        session.query(MarketData)
-                        .filter_by(symbol=symbol, timeframe=timeframe, open_time=timestamp)                        .first()
-                    )
-
-                    if existing:  # Update existing data
-                        setattr(existing, "open_price", open_price)
-                        setattr(existing, "high_price", high_price)
-                        setattr(existing, "low_price", low_price)
-                        setattr(existing, "close_price", close_price)
-                        setattr(existing, "volume", volume)
-                        setattr(existing, "quote_volume", quote_volume)
-                        setattr(existing, "trades_count", trades_count)
-                        setattr(existing, "close_time", datetime.fromtimestamp(int(kline[6]) / 1000))
-                    else:
-                        # Create new data
-                        market_data = MarketData(
-                            symbol=symbol,
-                            timeframe=timeframe,
-                            open_time=timestamp,
-                            close_time=datetime.fromtimestamp(int(kline[6]) / 1000),
-                            open_price=open_price,
-                            high_price=high_price,
-                            low_price=low_price,
-                            close_price=close_price,
-                            volume=volume,
-                            quote_volume=quote_volume,
-                            trades_count=trades_count,
-                        )
-                        session.add(market_data)
-
+                # 單一 upsert 取代逐筆 SELECT + INSERT/UPDATE
+                self._upsert_market_data(session, rows)
                 session.commit()
-                logger.debug(f"Stored {len(klines)} records for {symbol} {timeframe}")
-                return True
+            self._invalidate_market_data(symbol, timeframe)
+
+            logger.debug(f"Stored {len(klines)} records for {symbol} {timeframe}")
+            return True
 
         except Exception as e:
             logger.error(f"Failed to collect market data for {symbol}: {e}")
@@ -163,125 +306,271 @@ class DataManager:
         end_time: Optional[datetime] = None,
         limit: Optional[int] = None,
     ) -> pd.DataFrame:
-        """Retrieve market data from database"""
-        try:
-            with self.get_session() as session:
-                query = (
-                    session.query(MarketData)
-                    .filter(MarketData.symbol == symbol, MarketData.timeframe == timeframe)
-                    .order_by(MarketData.open_time)
-                )
+        """Retrieve market data from database, reusing recent identical queries"""
+        key = (
+            symbol, timeframe, start_time, end_time, limit,
+            self._market_data_versions.get((symbol, timeframe), 0),
+        )
+        df = self._market_data_cache.get(key, _market_data_cache_ttl(timeframe))
+        if df is None:
+            df = self._query_market_data(symbol, timeframe, start_time, end_time, limit)
+            if df.empty:
+                return df
+            self._market_data_cache.set(key, df)
+        # 呼叫端常直接在 DataFrame 上加指標欄位，回傳副本以免污染快取
+        return df.copy()
 
-                if start_time:
-                    query = query.filter(MarketData.open_time >= start_time)
-                if end_time:
-                    query = query.filter(MarketData.open_time <= end_time)
-                if limit:
-                    query = query.limit(limit)
-
-                records = query.all()
-
-                if not records:
-                    return pd.DataFrame()
-
-                # Convert to DataFrame
-                data = []
-                for record in records:
-                    data.append(
-                        {
-                            "timestamp": record.open_time,
-                            "open": record.open_price,
-                            "high": record.high_price,
-                            "low": record.low_price,
-                            "close": record.close_price,
-                            "volume": record.volume,
-                            "quote_volume": record.quote_volume,
-                            "trades_count": record.trades_count,
-                        }
+    def _query_market_data(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+        limit: Optional[int],
+    ) -> pd.DataFrame:
+        """Run the market data query"""
+        try:
+            stmt = _MARKET_DATA_STMT
+            params = {"symbol": symbol, "timeframe": timeframe}
+            if start_time:
+                stmt = stmt.where(MarketData.open_time >= bindparam("start_time"))
+                params["start_time"] = start_time
+            if end_time:
+                stmt = stmt.where(MarketData.open_time <= bindparam("end_time"))
+                params["end_time"] = end_time
+            if limit:
+                stmt = stmt.limit(limit)
+
+            # 筆數有上限時（訊號計算的常見情況）由 pandas 一次讀取，無需分段
+            if limit and limit <= MARKET_DATA_FETCH_SIZE:
+                with self.get_session() as session:
+                    df = pd.read_sql_query(
+                        stmt, session.connection(), params=params,
+                        index_col="timestamp", parse_dates=["timestamp"]
                     )
+                return df if not df.empty else pd.DataFrame()
 
-                df = pd.DataFrame(data)
-                df.set_index("timestamp", inplace=True)
-                return df
+            # 以伺服器端游標分段取回，每段直接轉為 DataFrame，避免整個結果集同時以 Python 物件存在
+            with self.get_session() as session:
+                result = session.execute(
+                    stmt.execution_options(stream_results=True, yield_per=MARKET_DATA_FETCH_SIZE),
+                    params,
+                )
+                columns = list(result.keys())
+                frames = [
+                    pd.DataFrame.from_records(part, columns=columns)
+                    for part in result.partitions()
+                ]
+
+            if not frames:
+                return pd.DataFrame()
+            df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+            df["timestamp"] = pd.to_datetime(df["timestamp"])
+            return df.set_index("timestamp")
 
         except Exception as e:
             logger.error(f"Failed to get market data for {symbol}: {e}")
             return pd.DataFrame()
 
+    def get_market_data_ticks(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """get_market_data with OHLC as int64 tick counts (price / tick_size)"""
+        df = self.get_market_data(symbol, timeframe, start_time, end_time, limit)
+        if df.empty:
+            return df
+        with self.get_session() as session:
+            tick_size = session.execute(
+                select(Symbol.tick_size).where(Symbol.symbol == symbol)
+            ).scalar()
+        if not tick_size:
+            logger.warning(f"No tick size stored for {symbol}, returning float prices")
+            return df
+        return to_price_ticks(df, tick_size)
+
     def get_latest_timestamp(self, symbol: str, timeframe: str) -> Optional[datetime]:
         """Get the latest timestamp for a symbol/timeframe"""
         try:
             with self.get_session() as session:
-                latest = (
-                    session.query(MarketData)
-                    .filter_by(symbol=symbol, timeframe=timeframe)
-                    .order_by(MarketData.open_time.desc())
-                    .first()                )
-
-                if latest:
-                    return latest.open_time  # type: ignore
-                return None
+                # MAX 可直接由 (symbol, timeframe, open_time) 索引的尾端取得，不載入整筆 ORM 物件
+                return session.execute(
+                    _LATEST_TS_STMT, {"symbol": symbol, "timeframe": timeframe}
+                ).scalar()
         except Exception as e:
             logger.error(f"Failed to get latest timestamp: {e}")
             return None
 
+    def get_latest_timestamps(
+        self, symbols: List[str], timeframes: List[str]
+    ) -> Dict[Tuple[str, str], datetime]:
+        """Get the latest timestamp for every symbol/timeframe pair in one query"""
+        try:
+            with self.get_session() as session:
+                rows = (
+                    session.query(MarketData.symbol, MarketData.timeframe, func.max(MarketData.open_time))
+                    .filter(MarketData.symbol.in_(symbols), MarketData.timeframe.in_(timeframes))
+                    .group_by(MarketData.symbol, MarketData.timeframe)
+                    .all()
+                )
+                return {(symbol, timeframe): latest for symbol, timeframe, latest in rows}
+        except Exception as e:
+            logger.error(f"Failed to get latest timestamps: {e}")
+            return {}
+
+    def get_active_symbols(self, quote_asset: str = "USDT") -> List[str]:
+        """Get active, trading symbols quoted in the given asset"""
+        try:
+            with self.get_session() as session:
+                # 只查詢 symbol 欄位，回傳純字串而非 Symbol ORM 物件
+                return [
+                    row[0]
+                    for row in session.query(Symbol.symbol)
+                    .filter(
+                        Symbol.is_active.is_(True),
+                        Symbol.quote_asset == quote_asset,
+                        Symbol.status == "TRADING",
+                    )
+                    .all()
+                ]
+        except Exception as e:
+            logger.error(f"Failed to get active symbols: {e}")
+            return []
+
     def bulk_collect_data(self, symbols: List[str], timeframes: Optional[List[str]] = None) -> None:
         """Bulk collect data for multiple symbols and timeframes"""
         try:
             if timeframes is None:
                 timeframes = ["1h", "4h", "1d"]
 
-            total_tasks = len(symbols) * len(timeframes)
-            completed = 0
+            asyncio.run(self._bulk_collect_async(symbols, timeframes))
 
-            for symbol in symbols:
-                for timeframe in timeframes:
-                    try:
-                        # Check if we need to update data
-                        latest_time = self.get_latest_timestamp(symbol, timeframe)
-                        
-                        # If we have recent data (within last hour), skip this symbol/timeframe
-                        if latest_time and datetime.utcnow() - latest_time < timedelta(hours=1):
-                            logger.debug(f"Skipping {symbol} {timeframe} - data is recent")
-                            completed += 1
-                            continue
-
-                        # Collect fresh data
-                        success = self.collect_market_data(
-                            symbol=symbol,
-                            timeframe=timeframe,
-                            limit=1000,
-                            start_time=latest_time,
-                        )
-
-                        if success:
-                            logger.debug(f"Successfully collected data for {symbol} {timeframe}")
-                        else:
-                            logger.warning(f"Failed to collect data for {symbol} {timeframe}")
-
-                    except Exception as e:
-                        logger.error(f"Error collecting data for {symbol} {timeframe}: {e}")
+        except Exception as e:
+            logger.error(f"Bulk data collection failed: {e}")
+            raise
 
-                    completed += 1
-                    if completed % 10 == 0:
-                        logger.info(f"Progress: {completed}/{total_tasks} tasks completed")
+    async def _bulk_collect_async(self, symbols: List[str], timeframes: List[str]) -> None:
+        """Fetch klines concurrently and hand them to a single database writer task"""
+        total_tasks = len(symbols) * len(timeframes)
+        completed = 0
+        # (symbol, timeframe, klines)；None 表示收集結束
+        queue: asyncio.Queue = asyncio.Queue()
+
+        # 一次 GROUP BY 查詢取得所有組合的最新時間，取代逐一查詢
+        latest_times = await asyncio.to_thread(self.get_latest_timestamps, symbols, timeframes)
+        # 最後一筆資料晚於此時間（一小時內）視為已是最新，整批共用同一個門檻
+        fresh_after = datetime.utcnow() - timedelta(hours=1)
+
+        async def collect_one(client: AsyncBinanceClient, symbol: str, timeframe: str) -> None:
+            nonlocal completed
+            try:
+                # Check if we need to update data
+                latest_time = latest_times.get((symbol, timeframe))
+
+                # If we have recent data (within last hour), skip this symbol/timeframe
+                if latest_time is not None and latest_time > fresh_after:
+                    logger.debug(f"Skipping {symbol} {timeframe} - data is recent")
+                    return
+
+                # Collect fresh data
+                klines = await client.get_klines(symbol, timeframe, limit=1000, start_time=latest_time)
+                if klines:
+                    await queue.put((symbol, timeframe, klines))
+                else:
+                    logger.warning(f"No data received for {symbol} {timeframe}")
+
+            except Exception as e:
+                logger.error(f"Error collecting data for {symbol} {timeframe}: {e}")
+            finally:
+                completed += 1
+                if completed % 10 == 0:
+                    logger.info(f"Progress: {completed}/{total_tasks} tasks completed")
+
+        async def write_all() -> None:
+            done = False
+            while not done:
+                # 一次取出所有已到達的結果，在同一個交易中寫入
+                batch = [await queue.get()]
+                while not queue.empty():
+                    batch.append(queue.get_nowait())
+                if batch[-1] is None:
+                    batch.pop()
+                    done = True
+                if batch:
+                    await asyncio.to_thread(self._store_kline_batches, batch)
+
+        writer = asyncio.create_task(write_all())
+        try:
+            async with AsyncBinanceClient(max_concurrency=BULK_COLLECT_CONCURRENCY) as client:
+                await asyncio.gather(
+                    *(collect_one(client, symbol, timeframe) for symbol in symbols for timeframe in timeframes)
+                )
+        finally:
+            await queue.put(None)
+            await writer
 
-            logger.info(f"Bulk data collection completed: {completed}/{total_tasks}")
+        logger.info(f"Bulk data collection completed: {completed}/{total_tasks}")
 
+    def _store_kline_batches(self, batch: List[tuple]) -> None:
+        """Upsert several (symbol, timeframe, klines) results in one transaction"""
+        try:
+            rows = [_kline_rows(symbol, timeframe, klines) for symbol, timeframe, klines in batch]
+            with self.get_session() as session:
+                for batch_rows in rows:
+                    self._upsert_market_data(session, batch_rows)
+                session.commit()
+            for symbol, timeframe, klines in batch:
+                self._invalidate_market_data(symbol, timeframe)
+                logger.debug(f"Stored {len(klines)} records for {symbol} {timeframe}")
         except Exception as e:
-            logger.error(f"Bulk data collection failed: {e}")
-            raise
+            logger.error(f"Failed to store market data batch: {e}")
 
     def cleanup_old_data(self, days: int = 30) -> None:
         """Clean up old market data older than specified days"""
         try:
             cutoff_date = datetime.utcnow() - timedelta(days=days)
 
+            # DELETE 不支援可攜的 LIMIT，改以主鍵子查詢分批刪除，每批各自提交
+            batch_ids = (
+                select(MarketData.id)
+                .where(MarketData.open_time < cutoff_date)
+                .limit(CLEANUP_BATCH_SIZE)
+                .scalar_subquery()
+            )
+            stmt = (
+                delete(MarketData)
+                .where(MarketData.id.in_(batch_ids))
+                .execution_options(synchronize_session=False)
+            )
+            # MySQL 不支援 IN 子查詢內的 LIMIT，但 DELETE 本身可直接帶 LIMIT
+            mysql_stmt = (
+                delete(MarketData)
+                .where(MarketData.open_time < cutoff_date)
+                .with_dialect_options(mysql_limit=CLEANUP_BATCH_SIZE)
+                .execution_options(synchronize_session=False)
+            )
+
+            deleted = 0
             with self.get_session() as session:
-                deleted = (
-                    session.query(MarketData).filter(MarketData.open_time < cutoff_date).delete()
-                )                session.commit()
-                logger.info(f"Cleaned up {deleted} old records")
+                if session.get_bind().dialect.name == "mysql":
+                    stmt = mysql_stmt
+                while True:
+                    n = session.execute(stmt).rowcount
+                    session.commit()
+                    deleted += n
+                    if n < CLEANUP_BATCH_SIZE:
+                        break
+
+                if deleted and session.get_bind().dialect.name == "sqlite":
+                    # 大量刪除後將 WAL 寫回主檔並截斷，避免 WAL 檔持續膨脹
+                    session.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+            self._market_data_cache.clear()
+
+            logger.info(f"Cleaned up {deleted} old records")
 
         except Exception as e:
             logger.error(f"Failed to cleanup old data: {e}")
@@ -295,7 +584,7 @@ class DataManager:
             if not latest_timestamp:
                 # 沒有數據，需要獲取歷史數據
                 logger.info(f"No existing data for {symbol} {timeframe}, fetching historical data...")
-                return self._fetch_historical_data(symbol, timeframe, required_periods * 2)
+                return self._fetch_historical_data(symbol, timeframe, required_periods * 2, backfill=True)
             
             # 檢查數據是否足夠新和足夠多
             with self.get_session() as session:
@@ -314,117 +603,138 @@ class DataManager:
             logger.error(f"Error ensuring data availability for {symbol} {timeframe}: {e}")
             return False
     
-    def _fetch_historical_data(self, symbol: str, timeframe: str, limit: int = 500) -> bool:
-        """獲取歷史數據"""
+    def get_data_counts(
+        self, symbols: List[str], timeframes: List[str]
+    ) -> Dict[Tuple[str, str], int]:
+        """Count stored rows for every symbol/timeframe pair in one query"""
+        try:
+            with self.get_session() as session:
+                rows = (
+                    session.query(MarketData.symbol, MarketData.timeframe, func.count())
+                    .filter(MarketData.symbol.in_(symbols), MarketData.timeframe.in_(timeframes))
+                    .group_by(MarketData.symbol, MarketData.timeframe)
+                    .all()
+                )
+                return {(symbol, timeframe): count for symbol, timeframe, count in rows}
+        except Exception as e:
+            logger.error(f"Failed to get data counts: {e}")
+            return {}
+
+    def ensure_data_availability_many(
+        self, symbols: List[str], timeframes: List[str], required_periods: int
+    ) -> Dict[Tuple[str, str], bool]:
+        """ensure_data_availability for many pairs, checking existing data with one GROUP BY query"""
+        counts = self.get_data_counts(symbols, timeframes)
+        results: Dict[Tuple[str, str], bool] = {}
+        for symbol in symbols:
+            for timeframe in timeframes:
+                count = counts.get((symbol, timeframe), 0)
+                if count >= required_periods:
+                    results[(symbol, timeframe)] = True
+                    continue
+                if count == 0:
+                    logger.info(f"No existing data for {symbol} {timeframe}, fetching historical data...")
+                else:
+                    logger.info(f"Insufficient data for {symbol} {timeframe} ({count}/{required_periods}), fetching more...")
+                results[(symbol, timeframe)] = self._fetch_historical_data(
+                    symbol, timeframe, required_periods * 2, backfill=count == 0
+                )
+        return results
+
+    def _fetch_historical_data(
+        self, symbol: str, timeframe: str, limit: int = 500, backfill: bool = False
+    ) -> bool:
+        """獲取歷史數據；backfill 表示該組合尚無任何資料"""
         try:
             klines = binance_client.get_klines(symbol, timeframe, limit=limit)
             if not klines:
                 return False
                 
             # 保存數據到資料庫
+            rows = _kline_rows(symbol, timeframe, klines)
             with self.get_session() as session:
-                for kline in klines:
-                    existing = session.query(MarketData).filter(
-                        MarketData.symbol == symbol,
-                        MarketData.timeframe == timeframe,
-                        MarketData.open_time == datetime.fromtimestamp(kline[0] / 1000)
-                    ).first()
-                    
-                    if not existing:
-                        market_data = MarketData(
-                            symbol=symbol,
-                            timeframe=timeframe,
-                            open_time=datetime.fromtimestamp(kline[0] / 1000),
-                            close_time=datetime.fromtimestamp(kline[6] / 1000),
-                            open_price=float(kline[1]),
-                            high_price=float(kline[2]),
-                            low_price=float(kline[3]),
-                            close_price=float(kline[4]),
-                            volume=float(kline[5]),
-                            quote_volume=float(kline[7]),
-                            trades_count=int(kline[8]),
-                        )
-                        session.add(market_data)
-                
-                session.commit()
-                logger.info(f"Stored {len(klines)} historical records for {symbol} {timeframe}")
-                return True
+                if backfill and session.get_bind().dialect.name == "postgresql":
+                    # 首次回補沒有衝突可處理，改走 COPY；期間若已有其他寫入造成衝突則退回 upsert
+                    try:
+                        self._copy_market_data(session, rows)
+                        session.commit()
+                    except Exception as e:
+                        session.rollback()
+                        logger.debug(f"COPY backfill failed for {symbol} {timeframe}, falling back to upsert: {e}")
+                        self._upsert_market_data(session, rows, update=False)
+                        session.commit()
+                else:
+                    # 歷史資料只補入缺少的 K 線，已存在的列不需改寫
+                    self._upsert_market_data(session, rows, update=False)
+                    session.commit()
+            self._invalidate_market_data(symbol, timeframe)
+
+            logger.info(f"Stored {len(klines)} historical records for {symbol} {timeframe}")
+            return True
                 
         except Exception as e:
             logger.error(f"Error fetching historical data for {symbol} {timeframe}: {e}")
             return False
 
+    async def _get_async_client(self) -> AsyncBinanceClient:
+        """取得共用的非同步客戶端，連線與 session 在每輪更新間重複使用"""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            # 綁定於已結束事件迴圈的連線無法再使用，改在當前迴圈重新建立
+            client = AsyncBinanceClient(max_concurrency=BULK_COLLECT_CONCURRENCY)
+            await client.connect()
+            self._async_client = client
+            self._async_client_loop = loop
+        return self._async_client
+
+    async def aclose(self) -> None:
+        """關閉共用的非同步客戶端"""
+        client = self._async_client
+        self._async_client = None
+        if client is not None and self._async_client_loop is asyncio.get_running_loop():
+            await client.close()
+        self._async_client_loop = None
+
     async def update_all_market_data(self, symbols: List[str], timeframes: List[str]) -> None:
         """批量更新所有監控交易對的市場數據"""
         try:
             logger.info(f"Updating market data for {len(symbols)} symbols, {len(timeframes)} timeframes...")
-            
-            for symbol in symbols:
-                for timeframe in timeframes:
-                    try:
-                        # 獲取最新的 K 線數據
-                        latest_klines = binance_client.get_klines(symbol, timeframe, limit=2)
-                        if latest_klines:
-                            # 只保存最新的數據
-                            await self._store_latest_data(symbol, timeframe, latest_klines[-1])
-                            
-                        # 避免 API 速率限制
-                        await asyncio.sleep(0.05)
-                        
-                    except Exception as e:
-                        logger.warning(f"Failed to update data for {symbol} {timeframe}: {e}")
-                        continue
-                        
+
+            async def fetch_latest(client: AsyncBinanceClient, symbol: str, timeframe: str) -> Optional[tuple]:
+                try:
+                    # 獲取最新的 K 線數據（速率由共用的權重 token bucket 控制）
+                    latest_klines = await client.get_klines(symbol, timeframe, limit=2)
+                    if latest_klines:
+                        # 只保存最新的數據
+                        return symbol, timeframe, latest_klines[-1:]
+                except Exception as e:
+                    logger.warning(f"Failed to update data for {symbol} {timeframe}: {e}")
+                return None
+
+            # 併發取得所有組合的最新 K 線，再以單一交易批次 upsert
+            client = await self._get_async_client()
+            results = await asyncio.gather(
+                *(fetch_latest(client, symbol, timeframe) for symbol in symbols for timeframe in timeframes)
+            )
+
+            batch = [result for result in results if result is not None]
+            if batch:
+                await asyncio.to_thread(self._store_kline_batches, batch)
+
             logger.info("Market data update completed")
             
         except Exception as e:
             logger.error(f"Error in update_all_market_data: {e}")
-    
-    async def _store_latest_data(self, symbol: str, timeframe: str, kline: List) -> None:
-        """存儲最新的 K 線數據"""
-        try:
-            with self.get_session() as session:
-                open_time = datetime.fromtimestamp(kline[0] / 1000)
-                
-                # 檢查是否已存在
-                existing = session.query(MarketData).filter(
-                    MarketData.symbol == symbol,
-                    MarketData.timeframe == timeframe,
-                    MarketData.open_time == open_time
-                ).first()
-                
-                if existing:
-                    # 更新現有數據
-                    existing.close_time = datetime.fromtimestamp(kline[6] / 1000)
-                    existing.open_price = float(kline[1])
-                    existing.high_price = float(kline[2])
-                    existing.low_price = float(kline[3])
-                    existing.close_price = float(kline[4])
-                    existing.volume = float(kline[5])
-                    existing.quote_volume = float(kline[7])
-                    existing.trades_count = int(kline[8])
-                else:
-                    # 創建新記錄
-                    market_data = MarketData(
-                        symbol=symbol,
-                        timeframe=timeframe,
-                        open_time=open_time,
-                        close_time=datetime.fromtimestamp(kline[6] / 1000),
-                        open_price=float(kline[1]),
-                        high_price=float(kline[2]),
-                        low_price=float(kline[3]),
-                        close_price=float(kline[4]),
-                        volume=float(kline[5]),
-                        quote_volume=float(kline[7]),
-                        trades_count=int(kline[8]),
-                    )
-                    session.add(market_data)
-                
-                session.commit()
-                
-        except Exception as e:
-            logger.error(f"Error storing latest data for {symbol} {timeframe}: {e}")
 
 
-# Global data manager instance
-data_manager = DataManager()
+@cache
+def get_data_manager() -> DataManager:
+    """Get the process-wide data manager, created on first use"""
+    return DataManager()
+
+
+def __getattr__(name: str):
+    # Global data manager instance：首次存取時才建立引擎與連線池
+    if name == "data_manager":
+        return get_data_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,11 +4,11 @@ Database package initialization
 from .models import (
     Base, Symbol, Strategy, Position, Trade, 
     MarketData, Backtest, TradingSession,
-    create_database, get_session_factory
+    create_database, ensure_schema, get_session_factory
 )
 
 __all__ = [
     'Base', 'Symbol', 'Strategy', 'Position', 'Trade',
     'MarketData', 'Backtest', 'TradingSession',
-    'create_database', 'get_session_factory'
+    'create_database', 'ensure_schema', 'get_session_factory'
 ]
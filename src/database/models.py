@@ -1,17 +1,48 @@
 """
 Database models for the trading bot
 """
+import threading
 from datetime import datetime
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from typing import Optional, Dict, Any, Set
 from sqlalchemy import (
     Column, Integer, String, Float, DateTime, Boolean, 
-    Text, JSON, ForeignKey, Index, create_engine
+    Text, JSON, ForeignKey, Index, create_engine, event, inspect, text
 )
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 
+try:
+    from loguru import logger
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
+
 Base = declarative_base()
 
+# 舊版資料庫上的非唯一索引，已由唯一索引 uq_symbol_timeframe_time 取代
+LEGACY_MARKET_DATA_INDEXES = ('idx_symbol_timeframe_time',)
+
+# 連線池大小：需容納併發的收集器與 API 請求，避免彼此排隊等待連線
+DB_POOL_SIZE = 32
+# 尖峰時可超出連線池的暫時連線數（與 SQLAlchemy 預設相同），用完即關閉
+DB_MAX_OVERFLOW = 10
+
+# SQLite 連線參數：WAL 讓讀取與寫入可同時進行，busy_timeout 讓寫入衝突時等待而非立即失敗；
+# 暫存資料放在記憶體，資料檔以 mmap 讀取（256MB）
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+# 多列 INSERT 每個語句的列數上限；psycopg2 的 UPDATE/DELETE executemany 亦以 execute_batch 分頁送出
+EXECUTEMANY_PAGE_SIZE = 1000
+
 
 class Symbol(Base):
     """Symbol information table"""
@@ -36,7 +67,6 @@ class Symbol(Base):
     # Relationships
     trades = relationship("Trade", back_populates="symbol_info")
     positions = relationship("Position", back_populates="symbol_info")
-    market_data = relationship("MarketData", back_populates="symbol_info")
 
 
 class Strategy(Base):
@@ -110,8 +140,11 @@ class MarketData(Base):
     __tablename__ = "market_data"
     
     id = Column(Integer, primary_key=True)
-    symbol = Column(String(20), ForeignKey("symbols.symbol"), nullable=False, index=True)
+    # symbol 的查詢由 (symbol, timeframe, open_time) 唯一索引的前綴涵蓋，不另建單欄索引；
+    # 不設外鍵，K 線寫入時免去每筆對 symbols 表的檢查
+    symbol = Column(String(20), nullable=False)
     timeframe = Column(String(10), nullable=False)  # 1m, 5m, 15m, 1h, 4h, 1d
+    # 保留單欄索引供 cleanup_old_data 依時間範圍刪除
     open_time = Column(DateTime, nullable=False, index=True)
     close_time = Column(DateTime, nullable=False)
     open_price = Column(Float, nullable=False)
@@ -122,11 +155,16 @@ class MarketData(Base):
     quote_volume = Column(Float, nullable=False)
     trades_count = Column(Integer)
     
-    # Relationships
-    symbol_info = relationship("Symbol", back_populates="market_data")
-    
     __table_args__ = (
-        Index('idx_symbol_timeframe_time', 'symbol', 'timeframe', 'open_time'),
+        # 唯一索引同時作為 K 線 upsert（ON CONFLICT）的衝突目標
+        # PostgreSQL 另將 OHLCV 欄位 INCLUDE 進索引，get_market_data 可走 index-only scan
+        Index(
+            'uq_symbol_timeframe_time', 'symbol', 'timeframe', 'open_time', unique=True,
+            postgresql_include=[
+                'open_price', 'high_price', 'low_price', 'close_price', 'volume', 'quote_volume',
+                'trades_count',
+            ],
+        ),
     )
 
 
@@ -170,14 +208,113 @@ class TradingSession(Base):
     notes = Column(Text)
 
 
+def _dedupe_market_data(engine) -> int:
+    """刪除重複的 (symbol, timeframe, open_time) K 線，每組保留 id 最小的一筆"""
+    table = MarketData.__tablename__
+    # 以衍生表包住子查詢，MySQL 才允許在 DELETE 中引用同一張表
+    stmt = text(
+        f"DELETE FROM {table} WHERE id NOT IN ("
+        f"SELECT id FROM (SELECT MIN(id) AS id FROM {table} "
+        f"GROUP BY symbol, timeframe, open_time) AS keep_ids)"
+    )
+    with engine.begin() as conn:
+        removed = conn.execute(stmt).rowcount
+    if removed:
+        logger.warning(f"Removed {removed} duplicate rows from {table} before adding the unique index")
+    return removed
+
+
+def _migrate_market_data_indexes(engine) -> None:
+    """Bring market_data indexes of an existing database up to date"""
+    # create_all 不會替既有的表補建索引；舊資料庫需補上 upsert 所需的唯一索引
+    existing = {ix["name"] for ix in inspect(engine).get_indexes(MarketData.__tablename__)}
+    for index in MarketData.__table__.indexes:
+        if index.name in existing:
+            continue
+        if index.unique:
+            # 舊版結構未限制唯一，殘留的重複資料會讓建立唯一索引失敗
+            _dedupe_market_data(engine)
+        try:
+            index.create(engine)
+        except IntegrityError as e:
+            logger.error(
+                f"Failed to create unique index {index.name} on {MarketData.__tablename__}: {e}. "
+                "Remove duplicate (symbol, timeframe, open_time) rows and restart; "
+                "market data upserts will fail until the index exists."
+            )
+    
+    # 唯一索引已涵蓋相同欄位，舊索引只會讓每次寫入多維護一份
+    created = {ix["name"] for ix in inspect(engine).get_indexes(MarketData.__tablename__)}
+    if not {index.name for index in MarketData.__table__.indexes} <= created:
+        return
+    on_table = f" ON {MarketData.__tablename__}" if engine.dialect.name == "mysql" else ""
+    for name in LEGACY_MARKET_DATA_INDEXES:
+        if name in created:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP INDEX {name}{on_table}"))
+            logger.info(f"Dropped legacy index {name} from {MarketData.__tablename__}")
+
+
+def _is_sqlite_memory(url: URL) -> bool:
+    """Whether a SQLite URL points at an in-memory database (sqlite://, :memory:, file::memory:)"""
+    database = url.database or ""
+    return database in ("", ":memory:") or database.startswith("file::memory:") or url.query.get("mode") == "memory"
+
+
+@lru_cache(maxsize=None)
+def _get_engine(database_url: str) -> Engine:
+    """Create the engine (and its connection pool) for a URL once per process"""
+    engine_kwargs: Dict[str, Any] = {"pool_pre_ping": True}
+    url = make_url(database_url)
+    is_sqlite = url.get_backend_name() == "sqlite"
+    if is_sqlite:
+        # 連線會在收集器的執行緒間共用
+        engine_kwargs["connect_args"] = {"check_same_thread": False}
+    if not (is_sqlite and _is_sqlite_memory(url)):
+        # 記憶體 SQLite 使用單連線池，不支援以下參數
+        engine_kwargs.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+    engine_kwargs["insertmanyvalues_page_size"] = EXECUTEMANY_PAGE_SIZE
+    if url.get_backend_name() == "postgresql" and url.get_driver_name() == "psycopg2":
+        # bulk_update_mappings 等 executemany 改用 execute_batch，不再逐列往返
+        engine_kwargs.update(executemany_mode="values_plus_batch", executemany_batch_page_size=EXECUTEMANY_PAGE_SIZE)
+    engine = create_engine(database_url, **engine_kwargs)
+
+    if is_sqlite:
+        @event.listens_for(engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in SQLITE_PRAGMAS:
+                cursor.execute(pragma)
+            cursor.close()
+
+    return engine
+
+
+# 已完成建表檢查的資料庫 URL，每個行程只需檢查一次
+_schema_ready: Set[str] = set()
+_schema_lock = threading.Lock()
+
+
+def ensure_schema(engine: Engine) -> None:
+    """Create missing tables and indexes, once per database URL"""
+    key = str(engine.url)
+    with _schema_lock:
+        if key in _schema_ready:
+            return
+        Base.metadata.create_all(engine)
+        _migrate_market_data_indexes(engine)
+        _schema_ready.add(key)
+
+
 def create_database(database_url: str):
     """Create database and tables"""
-    engine = create_engine(database_url)
-    Base.metadata.create_all(engine)
+    engine = _get_engine(database_url)
+    ensure_schema(engine)
     return engine
 
 
+@lru_cache(maxsize=None)
 def get_session_factory(database_url: str):
-    """Get database session factory"""
+    """Get database session factory (shared by every caller using the same URL)"""
     engine = create_database(database_url)
     return sessionmaker(bind=engine)
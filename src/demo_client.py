@@ -2,30 +2,102 @@
 """
 Demo 模式模擬客戶端 - 提供模擬交易功能
 """
-import random
+import json
 import time
+from collections import deque
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from itertools import islice
+from types import MappingProxyType
 from typing import Dict, List, Any, Optional, Union
+
+import numpy as np
 from loguru import logger
 
 
+# 模擬訂單最多保留筆數，超過時自動淘汰最舊的訂單
+MAX_DEMO_ORDERS = 10_000
+
+# 查無資產時的唯讀預設餘額
+_EMPTY_BALANCE = MappingProxyType({'free': 0.0, 'locked': 0.0, 'total': 0.0})
+
+
+def _avg_entry(old_qty: float, old_entry: float, exec_qty: float, exec_price: float) -> tuple:
+    """加倉後的持倉數量與加權平均開倉價"""
+    new_qty = old_qty + exec_qty
+    if new_qty <= 0:
+        return new_qty, exec_price
+    return new_qty, (old_qty * old_entry + exec_qty * exec_price) / new_qty
+
+
+@dataclass(slots=True)
+class DemoOrder:
+    """已成交的模擬訂單，只在回傳給呼叫端時才轉為 Binance 格式的字典"""
+    order_id: int
+    symbol: str
+    side: str
+    type: str
+    qty: float
+    price: float
+    commission: float
+    ts: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        """轉為 Binance API 格式（數值欄位為字串）"""
+        qty = str(self.qty)
+        price = str(self.price)
+        return {
+            'orderId': self.order_id,
+            'symbol': self.symbol,
+            'side': self.side,
+            'type': self.type,
+            'origQty': qty,
+            'executedQty': qty,
+            'status': 'FILLED',
+            'timeInForce': 'GTC',
+            'price': price,
+            'fills': [{
+                'price': price,
+                'qty': qty,
+                'commission': str(self.commission),
+                'commissionAsset': 'USDT'
+            }],
+            'transactTime': self.ts
+        }
+
+
 class DemoModeClient:
     """Demo 模式模擬 Binance 客戶端"""
     
+    # 模擬價格基準
+    _BASE_PRICES = MappingProxyType({
+        'BTCUSDT': 45000.0,
+        'ETHUSDT': 3000.0,
+        'ADAUSDT': 0.5,
+        'DOTUSDT': 8.0,
+        'LINKUSDT': 15.0
+    })
+    # get_24hr_ticker() 不指定交易對時回傳的交易對
+    _TICKER_SYMBOLS = ('BTCUSDT', 'ETHUSDT', 'ADAUSDT', 'DOTUSDT', 'LINKUSDT')
+    # get_exchange_info() 列出的交易對；以不可變的 tuple 保存，每次呼叫再建立新的結果
+    _EXCHANGE_SYMBOLS = ('BTCUSDT', 'ETHUSDT', 'ADAUSDT')
+    
     def __init__(self):
         self.demo_balance = {
             'USDT': {'free': 10000.0, 'locked': 0.0, 'total': 10000.0}
         }
         self.demo_positions = {}
-        self.demo_orders = []
+        self.demo_orders: deque = deque(maxlen=MAX_DEMO_ORDERS)
         self.order_id_counter = 1000
+        # 共用的亂數產生器，K 線等批次模擬資料一次產生整個陣列
+        self._rng = np.random.default_rng()
         
         logger.info("🎮 Demo 模式已啟動 - 所有交易都是模擬的")
     
     def get_server_time(self) -> Dict[str, Any]:
         """模擬獲取伺服器時間"""
         return {
-            'serverTime': int(time.time() * 1000)
+            'serverTime': time.time_ns() // 1_000_000
         }
     
     def get_account_info(self) -> Dict[str, Any]:
@@ -53,32 +125,39 @@ class DemoModeClient:
     
     def get_futures_account(self) -> Dict[str, Any]:
         """模擬獲取合約帳戶信息"""
-        total_balance = sum(balance['total'] for balance in self.demo_balance.values())
-        
+        # 單次走訪同時累計總額並格式化各資產，每個數值只轉一次字串
+        total_balance = 0.0
+        total_free = 0.0
         assets = []
         for asset, balance in self.demo_balance.items():
+            total = balance['total']
+            free = balance['free']
+            total_balance += total
+            total_free += free
+            total_str = str(total)
             assets.append({
                 'asset': asset,
-                'walletBalance': str(balance['total']),
+                'walletBalance': total_str,
                 'unrealizedProfit': '0.00000000',
-                'marginBalance': str(balance['total']),
-                'availableBalance': str(balance['free'])
+                'marginBalance': total_str,
+                'availableBalance': str(free)
             })
         
+        total_balance_str = str(total_balance)
         return {
-            'totalWalletBalance': str(total_balance),
+            'totalWalletBalance': total_balance_str,
             'totalUnrealizedProfit': '0.00000000',
-            'totalMarginBalance': str(total_balance),
+            'totalMarginBalance': total_balance_str,
             'totalInitialMargin': '0.00000000',
             'totalMaintMargin': '0.00000000',
-            'availableBalance': str(sum(balance['free'] for balance in self.demo_balance.values())),
+            'availableBalance': str(total_free),
             'assets': assets
         }
     
     def get_futures_balance(self, asset: Optional[str] = None) -> Dict[str, Any]:
         """模擬獲取合約餘額"""
         if asset:
-            balance = self.demo_balance.get(asset, {'free': 0.0, 'locked': 0.0, 'total': 0.0})
+            balance = self.demo_balance.get(asset, _EMPTY_BALANCE)
             return {
                 'wallet_balance': balance['total'],
                 'unrealized_pnl': 0.0,
@@ -89,36 +168,49 @@ class DemoModeClient:
     
     def get_futures_positions(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
         """模擬獲取合約持倉"""
-        positions = []
-        for pos_symbol, position in self.demo_positions.items():
-            if symbol is None or pos_symbol == symbol:
-                positions.append({
-                    'symbol': pos_symbol,
-                    'positionAmt': str(position['quantity']),
-                    'entryPrice': str(position['entry_price']),
-                    'markPrice': str(position['mark_price']),
-                    'unRealizedProfit': str(position['unrealized_pnl']),
-                    'positionSide': position['side']
-                })
-        return positions
+        # 指定交易對時直接查表，不走訪所有持倉
+        if symbol is not None:
+            position = self.demo_positions.get(symbol)
+            return [self._format_position(symbol, position)] if position else []
+        return [self._format_position(pos_symbol, position) for pos_symbol, position in self.demo_positions.items()]
+    
+    @staticmethod
+    def _format_position(symbol: str, position: Dict[str, Any]) -> Dict[str, Any]:
+        """持倉轉為 Binance API 格式"""
+        return {
+            'symbol': symbol,
+            'positionAmt': str(position['quantity']),
+            'entryPrice': str(position['entry_price']),
+            'markPrice': str(position['mark_price']),
+            'unRealizedProfit': str(position['unrealized_pnl']),
+            'positionSide': position['side']
+        }
     
     def get_24hr_ticker(self, symbol: Optional[str] = None) -> Dict[str, Any]:
         """模擬獲取 24 小時價格統計"""
-        if symbol:
-            # 模擬價格數據
-            base_price = self._get_demo_price(symbol)
-            return {
-                'symbol': symbol,
-                'lastPrice': str(base_price),
-                'priceChange': str(random.uniform(-100, 100)),
-                'priceChangePercent': str(random.uniform(-5, 5)),
-                'volume': str(random.uniform(1000000, 10000000)),
-                'quoteVolume': str(random.uniform(50000000, 500000000))
+        # 單一或多個交易對都以批次亂數產生
+        symbols = (symbol,) if symbol else self._TICKER_SYMBOLS
+        n = len(symbols)
+        rng = self._rng
+        tickers = [
+            {
+                'symbol': sym,
+                'lastPrice': str(price),
+                'priceChange': str(change),
+                'priceChangePercent': str(change_pct),
+                'volume': str(volume),
+                'quoteVolume': str(quote_volume)
             }
-        else:
-            # 返回多個交易對的數據
-            symbols = ['BTCUSDT', 'ETHUSDT', 'ADAUSDT', 'DOTUSDT', 'LINKUSDT']
-            return [self.get_24hr_ticker(s) for s in symbols]
+            for sym, price, change, change_pct, volume, quote_volume in zip(
+                symbols,
+                self._get_demo_prices_batch(symbols).tolist(),
+                rng.uniform(-100, 100, n).tolist(),
+                rng.uniform(-5, 5, n).tolist(),
+                rng.uniform(1000000, 10000000, n).tolist(),
+                rng.uniform(50000000, 500000000, n).tolist(),
+            )
+        ]
+        return tickers[0] if symbol else tickers
     
     def get_klines(self, **params) -> List[List[str]]:
         """模擬獲取 K 線數據"""
@@ -127,17 +219,20 @@ class DemoModeClient:
         limit = params.get('limit', 100)
         
         base_price = self._get_demo_price(symbol)
-        klines = []
+        rng = self._rng
         
-        for i in range(limit):
-            timestamp = int(time.time() * 1000) - (limit - i) * 3600000  # 每小時
-            open_price = base_price + random.uniform(-100, 100)
-            close_price = open_price + random.uniform(-50, 50)
-            high_price = max(open_price, close_price) + random.uniform(0, 20)
-            low_price = min(open_price, close_price) - random.uniform(0, 20)
-            volume = random.uniform(100, 1000)
-            
-            klines.append([
+        # 一次產生所有欄位的隨機陣列，取代逐根 K 線呼叫 random
+        timestamps = time.time_ns() // 1_000_000 - np.arange(limit, 0, -1, dtype=np.int64) * 3600000  # 每小時
+        opens = base_price + rng.uniform(-100, 100, limit)
+        closes = opens + rng.uniform(-50, 50, limit)
+        highs = np.maximum(opens, closes) + rng.uniform(0, 20, limit)
+        lows = np.minimum(opens, closes) - rng.uniform(0, 20, limit)
+        volumes = rng.uniform(100, 1000, limit)
+        quote_volumes = volumes * closes
+        trades = rng.integers(100, 1001, limit)
+        
+        klines = [
+            [
                 str(timestamp),
                 str(open_price),
                 str(high_price),
@@ -145,12 +240,16 @@ class DemoModeClient:
                 str(close_price),
                 str(volume),
                 str(timestamp + 3600000),
-                str(volume * close_price),
-                str(random.randint(100, 1000)),
+                str(quote_volume),
+                str(trade_count),
                 str(volume * 0.8),
-                str(volume * close_price * 0.8),
+                str(quote_volume * 0.8),
                 '0'
-            ])
+            ]
+            for timestamp, open_price, high_price, low_price, close_price, volume, quote_volume, trade_count
+            in zip(timestamps.tolist(), opens.tolist(), highs.tolist(), lows.tolist(), closes.tolist(),
+                   volumes.tolist(), quote_volumes.tolist(), trades.tolist())
+        ]
         
         return klines
     
@@ -173,36 +272,18 @@ class DemoModeClient:
         order_id = self.order_id_counter
         self.order_id_counter += 1
         
-        # 模擬訂單執行
-        executed_qty = quantity
-        executed_price = price
-        commission = executed_qty * executed_price * 0.001  # 0.1% 手續費
-        
-        order = {
-            'orderId': order_id,
-            'symbol': symbol,
-            'side': side,
-            'type': order_type,
-            'origQty': str(quantity),
-            'executedQty': str(executed_qty),
-            'status': 'FILLED',
-            'timeInForce': 'GTC',
-            'price': str(price),
-            'fills': [{
-                'price': str(executed_price),
-                'qty': str(executed_qty),
-                'commission': str(commission),
-                'commissionAsset': 'USDT'
-            }],
-            'transactTime': int(time.time() * 1000)
-        }
+        # 模擬訂單以市價全部成交
+        commission = quantity * price * 0.001  # 0.1% 手續費
+        order = DemoOrder(order_id, symbol, side, order_type, quantity, price, commission,
+                          time.time_ns() // 1_000_000)
         
         # 更新模擬餘額和持倉
         self._update_demo_balance(order)
+        self.demo_orders.append(order)
         
-        logger.info(f"🎮 模擬訂單執行: {side} {executed_qty} {symbol} @ {executed_price}")
+        logger.info(f"🎮 模擬訂單執行: {side} {quantity} {symbol} @ {price}")
         
-        return order
+        return order.to_dict()
     
     def get_open_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
         """模擬獲取開放訂單"""
@@ -219,24 +300,21 @@ class DemoModeClient:
     
     def _get_demo_price(self, symbol: str) -> float:
         """獲取模擬價格"""
-        base_prices = {
-            'BTCUSDT': 45000.0,
-            'ETHUSDT': 3000.0,
-            'ADAUSDT': 0.5,
-            'DOTUSDT': 8.0,
-            'LINKUSDT': 15.0
-        }
-        base = base_prices.get(symbol, 100.0)
-        # 添加一些隨機波動
-        return base + random.uniform(-base * 0.02, base * 0.02)
+        # 添加 ±2% 的隨機波動
+        return self._BASE_PRICES.get(symbol, 100.0) * float(self._rng.uniform(0.98, 1.02))
     
-    def _update_demo_balance(self, order: Dict[str, Any]) -> None:
+    def _get_demo_prices_batch(self, symbols) -> np.ndarray:
+        """一次獲取多個交易對的模擬價格"""
+        base = np.array([self._BASE_PRICES.get(symbol, 100.0) for symbol in symbols])
+        return base * self._rng.uniform(0.98, 1.02, len(base))
+    
+    def _update_demo_balance(self, order: DemoOrder) -> None:
         """更新模擬餘額"""
-        symbol = order['symbol']
-        side = order['side']
-        executed_qty = float(order['executedQty'])
-        executed_price = float(order['fills'][0]['price'])
-        commission = float(order['fills'][0]['commission'])
+        symbol = order.symbol
+        side = order.side
+        executed_qty = order.qty
+        executed_price = order.price
+        commission = order.commission
         
         # 簡化實現：只處理 USDT 交易對
         if side == 'BUY':
@@ -257,9 +335,9 @@ class DemoModeClient:
                 }
             
             pos = self.demo_positions[symbol]
-            total_cost = pos['quantity'] * pos['entry_price'] + executed_qty * executed_price
-            pos['quantity'] += executed_qty
-            pos['entry_price'] = total_cost / pos['quantity'] if pos['quantity'] > 0 else executed_price
+            pos['quantity'], pos['entry_price'] = _avg_entry(
+                pos['quantity'], pos['entry_price'], executed_qty, executed_price
+            )
             pos['mark_price'] = executed_price
             
         elif side == 'SELL':
@@ -286,14 +364,12 @@ class DemoModeClient:
         return self.get_24hr_ticker(symbol)
     
     def get_exchange_info(self) -> Dict[str, Any]:
-        """模擬交易所信息"""
-        return {
-            'symbols': [
-                {'symbol': 'BTCUSDT', 'status': 'TRADING'},
-                {'symbol': 'ETHUSDT', 'status': 'TRADING'},
-                {'symbol': 'ADAUSDT', 'status': 'TRADING'}
-            ]
-        }
+        """模擬交易所信息（每次回傳新的物件，呼叫端可自由修改）"""
+        return {'symbols': [{'symbol': symbol, 'status': 'TRADING'} for symbol in self._EXCHANGE_SYMBOLS]}
+    
+    def recent_orders(self, limit: int) -> List[Dict[str, Any]]:
+        """最近的 limit 筆模擬訂單（由舊到新）"""
+        return [order.to_dict() for order in list(islice(reversed(self.demo_orders), limit))[::-1]]
     
     def get_order(self, symbol: str, orderId: int) -> Dict[str, Any]:
         """模擬查詢訂單"""
@@ -321,6 +397,18 @@ class DemoModeClient:
         """模擬取消合約訂單"""
         return self.cancel_order(**params)
     
+    def futures_cancel_orders(self, **params) -> List[Dict[str, Any]]:
+        """模擬批次取消合約訂單"""
+        symbol = params.get('symbol', '')
+        return [
+            self.cancel_order(symbol=symbol, orderId=order_id)
+            for order_id in json.loads(params.get('orderIdList', '[]'))
+        ]
+    
+    def futures_cancel_all_open_orders(self, **params) -> Dict[str, Any]:
+        """模擬取消所有合約訂單"""
+        return {'code': 200, 'msg': 'The operation of cancel all open order is done.'}
+    
     def futures_get_open_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
         """別名：get_open_orders for futures"""
         return self.get_open_orders(symbol)
@@ -2,68 +2,158 @@
 """
 Discord 通知器 - 支援 Demo 和紙上交易模式
 """
+import atexit
+import os
+import queue
+import threading
+import time
+
 import requests
 import json
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from .config import config
 
+try:
+    # orjson 直接輸出 bytes，序列化巢狀 embed 比標準庫 json 快數倍
+    from orjson import dumps as _json_dumps
+except ImportError:
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+
+# webhook 遇到限流或伺服器錯誤時由連線層重試（會依 Retry-After 等待）
+WEBHOOK_RETRY = Retry(
+    total=2,
+    backoff_factor=0.3,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({'POST'}),
+)
+
+# 待送出通知的佇列上限；佇列滿時丟棄新通知，避免阻塞交易流程
+NOTIFICATION_QUEUE_SIZE = 256
+# 背景執行緒收到通知後等待此秒數，將期間內的其他通知合併成一則 webhook 訊息
+NOTIFICATION_COALESCE_WINDOW = 0.2
+# Discord 單則 webhook 訊息最多可帶的 embed 數
+DISCORD_MAX_EMBEDS = 10
+# 行程結束時等待背景執行緒送完佇列的最長秒數，webhook 無回應時不會卡住結束流程
+NOTIFICATION_SHUTDOWN_TIMEOUT = 5.0
+
+# 放入佇列通知背景執行緒送完已排入的訊息後結束
+_STOP = object()
+
+
+# 投資組合數值欄位 (名稱, 鍵, 預先綁定的格式化函式)
+_PORTFOLIO_VALUE_FIELDS = (
+    ("總資產價值", 'total_value', "${:,.2f}".format),
+    ("可用餘額", 'available_balance', "${:,.2f}".format),
+    ("未實現盈虧", 'unrealized_pnl', "${:+,.4f}".format),
+    ("今日盈虧", 'daily_pnl', "${:+,.4f}".format),
+    ("總盈虧百分比", 'pnl_percentage', "{:+.2f}%".format),
+)
+
+
+def _compute_trading_mode() -> str:
+    """當前交易模式的顯示名稱"""
+    if config.binance.demo_mode:
+        return "🎮 Demo 模式"
+    elif config.binance.paper_trading:
+        return "📋 紙上交易"
+    elif config.binance.testnet:
+        return "🧪 Testnet"
+    else:
+        return "🔴 真實交易"
+
+
+# 交易模式在行程啟動後不會改變，所有通知器實例共用
+_TRADING_MODE = _compute_trading_mode()
+
 
 class DiscordNotifier:
     """Discord 通知器"""
     
+    # 固定的顯示設定在類別層級建立一次，不在每次通知時重建
+    _ICON_URL = "https://cryptologos.cc/logos/binance-coin-bnb-logo.png"
+    # 交易模式 -> (顏色, 前綴)
+    _MODE_CONFIG = {
+        "🎮 Demo 模式": (0x9932cc, "🎮"),
+        "📋 紙上交易": (0x1e90ff, "📋"),
+        "🧪 Testnet": (0xffa500, "🧪"),
+        "🔴 真實交易": (0xff0000, "🔴"),
+    }
+    _SIDE_EMOJI = {'BUY': '🟢', 'SELL': '🔴'}
+    _SIGNAL_EMOJI = {'BUY': '🟢', 'SELL': '🔴', 'HOLD': '🟡', 'UNKNOWN': '⚪'}
+    _SIDE_COLORS = {'BUY': 0x00ff00, 'SELL': 0xff0000}
+    _ALERT_EMOJI = {"info": "ℹ️", "success": "✅", "warning": "⚠️", "error": "❌", "critical": "🚨"}
+    _ALERT_COLORS = {
+        "info": 0x3498db,
+        "success": 0x2ecc71,
+        "warning": 0xf39c12,
+        "error": 0xe74c3c,
+        "critical": 0x8b0000,
+    }
+    
     def __init__(self):
         # 從配置讀取 webhook URL（支援兩種配置名稱）
         self.webhook_url = (
-            config.binance.__dict__.get('discord_webhook') or 
+            getattr(config.binance, 'discord_webhook', None) or 
             os.getenv('DISCORD_WEBHOOK') or 
             os.getenv('DISCORD_WEBHOOK_URL')
         )
         self.enabled = bool(self.webhook_url)
         
+        # 共用 Session：重複使用 TCP/TLS 連線，標頭只設定一次
+        self._session = requests.Session()
+        self._session.headers.update({"Content-Type": "application/json"})
+        self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=WEBHOOK_RETRY))
+        
         # 判斷當前交易模式
         self.trading_mode = self._get_trading_mode()
+        # 各類通知的 footer 只依交易模式而定，建立一次後重複使用（僅被序列化，不會被修改）
+        self._footers = {
+            kind: {"text": f"{kind} | {self.trading_mode}", "icon_url": self._ICON_URL}
+            for kind in ("Binance Trading Bot", "Strategy Signal", "Portfolio Update", "System Alert", "Bot Startup")
+        }
+        self._portfolio_title = f"💼 投資組合更新 ({self.trading_mode})"
+        self._username = f"Binance Trading Bot ({self.trading_mode})"
+        
+        # 通知由背景執行緒送出，呼叫端（交易迴圈）不必等待 HTTP 往返
+        self._q: "queue.Queue[Any]" = queue.Queue(maxsize=NOTIFICATION_QUEUE_SIZE)
+        
+        self._thread: Optional[threading.Thread] = None
         
         if self.enabled:
+            self._thread = threading.Thread(target=self._drain, name="discord-notifier", daemon=True)
+            self._thread.start()
+            # 結束前送完佇列中的通知，最多等待 NOTIFICATION_SHUTDOWN_TIMEOUT 秒
+            atexit.register(self.close)
             logger.info(f"✅ Discord 通知已啟用 - 交易模式: {self.trading_mode}")
         else:
             logger.warning("⚠️  Discord webhook 未配置")
     
     def _get_trading_mode(self) -> str:
         """獲取當前交易模式"""
-        if config.binance.demo_mode:
-            return "🎮 Demo 模式"
-        elif config.binance.paper_trading:
-            return "📋 紙上交易"
-        elif config.binance.testnet:
-            return "🧪 Testnet"
-        else:
-            return "🔴 真實交易"
+        return _TRADING_MODE
     
-    def send_message(self, content: str, embed: Optional[Dict[str, Any]] = None) -> bool:
-        """發送訊息到 Discord"""
-        if not self.enabled:
-            logger.debug("Discord webhook not configured, skipping notification")
-            return False
-            
+    def _build_payload(self, content: str, embed: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        payload = {
+            "content": content,
+            "username": self._username,
+            "avatar_url": self._ICON_URL
+        }
+        if embed:
+            payload["embeds"] = [embed]
+        return payload
+    
+    def _post(self, payload: Dict[str, Any]) -> bool:
+        """同步送出一則 webhook 訊息"""
         try:
-            payload = {
-                "content": content,
-                "username": f"Binance Trading Bot ({self.trading_mode})",
-                "avatar_url": "https://cryptologos.cc/logos/binance-coin-bnb-logo.png"
-            }
-            
-            if embed:
-                payload["embeds"] = [embed]
-                
-            response = requests.post(
-                self.webhook_url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=10
-            )
+            # Content-Type 已設定在 Session 標頭上
+            response = self._session.post(self.webhook_url, data=_json_dumps(payload), timeout=10)
             
             if response.status_code == 204:
                 logger.success("Discord message sent successfully")
@@ -76,79 +166,118 @@ class DiscordNotifier:
             logger.error(f"Error sending Discord message: {e}")
             return False
     
+    def _drain(self) -> None:
+        """背景執行緒：收集短時間內的通知，合併後送出；收到 _STOP 時送完手上的通知後結束"""
+        while True:
+            items = [self._q.get()]
+            deadline = time.monotonic() + NOTIFICATION_COALESCE_WINDOW
+            while len(items) < DISCORD_MAX_EMBEDS and items[-1] is not _STOP:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            stop = items[-1] is _STOP
+            try:
+                for payload in self._coalesce([item for item in items if item is not _STOP]):
+                    self._post(payload)
+            finally:
+                for _ in items:
+                    self._q.task_done()
+            if stop:
+                return
+    
+    def close(self, timeout: float = NOTIFICATION_SHUTDOWN_TIMEOUT) -> None:
+        """送完佇列中的通知並停止背景執行緒，最多等待 timeout 秒"""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            self._q.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("Discord notification queue still full at shutdown, pending messages dropped")
+            return
+        thread.join(max(0.0, deadline - time.monotonic()))
+        if thread.is_alive():
+            logger.warning(f"Discord notifications not flushed within {timeout}s, pending messages dropped")
+        else:
+            self._thread = None
+    
+    @staticmethod
+    def _coalesce(payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """將只有 embed 的連續訊息合併，每則不超過 DISCORD_MAX_EMBEDS 個 embed"""
+        merged: List[Dict[str, Any]] = []
+        for payload in payloads:
+            last = merged[-1] if merged else None
+            if (
+                last is not None
+                and not payload["content"]
+                and "embeds" in payload
+                and "embeds" in last
+                and len(last["embeds"]) + len(payload["embeds"]) <= DISCORD_MAX_EMBEDS
+            ):
+                last["embeds"].extend(payload["embeds"])
+            else:
+                merged.append(payload)
+        return merged
+    
+    def _enqueue(self, payload: Dict[str, Any]) -> bool:
+        try:
+            self._q.put_nowait(payload)
+            return True
+        except queue.Full:
+            logger.warning("Discord notification queue full, dropping message")
+            return False
+    
+    def send_message(self, content: str, embed: Optional[Dict[str, Any]] = None) -> bool:
+        """將訊息排入佇列，由背景執行緒發送到 Discord
+        
+        回傳 True 只代表已排入佇列，不代表已送達（送出失敗僅記錄於日誌）；
+        其他 send_* 方法相同。需要確認實際送達時請使用 test_webhook()。
+        """
+        if not self.enabled:
+            logger.debug("Discord webhook not configured, skipping notification")
+            return False
+        
+        return self._enqueue(self._build_payload(content, embed))
+    
     def send_trade_notification(self, trade_data: Dict[str, Any]) -> bool:
         """發送交易通知"""
         if not self.enabled:
             return False
         
-        # 根據交易模式設置不同的顏色和前綴
-        mode_config = {
-            "🎮 Demo 模式": {"color": 0x9932cc, "prefix": "🎮"},
-            "📋 紙上交易": {"color": 0x1e90ff, "prefix": "📋"},
-            "🧪 Testnet": {"color": 0xffa500, "prefix": "🧪"},
-            "🔴 真實交易": {"color": 0xff0000, "prefix": "🔴"}
-        }
-        
-        mode_info = mode_config.get(self.trading_mode, {"color": 0x808080, "prefix": "?"})
+        # 根據交易模式設置不同的前綴
+        _, prefix = self._MODE_CONFIG.get(self.trading_mode, (0x808080, "?"))
         
         side = trade_data.get('side', 'UNKNOWN')
-        emoji = "🟢" if side == 'BUY' else "🔴" if side == 'SELL' else "⚪"
+        emoji = self._SIDE_EMOJI.get(side, "⚪")
+        
+        now = datetime.now()
+        price = trade_data.get('price')
+        quantity = trade_data.get('quantity')
+        commission = trade_data.get('commission')
+        fields = [
+            {"name": "交易模式", "value": self.trading_mode, "inline": True},
+            {"name": "交易對", "value": trade_data.get('symbol', 'N/A'), "inline": True},
+            {"name": "數量", "value": f"{trade_data.get('quantity', 'N/A')}", "inline": True},
+            {"name": "價格", "value": f"${float(price):,.2f}" if price else 'N/A', "inline": True},
+            {"name": "總金額", "value": f"${float(quantity) * float(price):,.2f}" if quantity and price else 'N/A',
+             "inline": True},
+            {"name": "手續費", "value": f"${float(commission):.4f}" if commission else 'N/A', "inline": True},
+            {"name": "策略", "value": trade_data.get('strategy', 'N/A'), "inline": True},
+            {"name": "訂單 ID", "value": str(trade_data.get('order_id', 'N/A')), "inline": True},
+            {"name": "時間", "value": now.strftime("%Y-%m-%d %H:%M:%S"), "inline": False},
+        ]
         
         embed = {
-            "title": f"{mode_info['prefix']} 交易執行 - {emoji} {side}",
-            "color": 0x00ff00 if side == 'BUY' else 0xff0000,
-            "fields": [
-                {
-                    "name": "交易模式", 
-                    "value": self.trading_mode, 
-                    "inline": True
-                },
-                {
-                    "name": "交易對", 
-                    "value": trade_data.get('symbol', 'N/A'), 
-                    "inline": True
-                },
-                {
-                    "name": "數量", 
-                    "value": f"{trade_data.get('quantity', 'N/A')}", 
-                    "inline": True
-                },
-                {
-                    "name": "價格", 
-                    "value": f"${float(trade_data.get('price', 0)):,.2f}" if trade_data.get('price') else 'N/A', 
-                    "inline": True
-                },
-                {
-                    "name": "總金額", 
-                    "value": f"${float(trade_data.get('quantity', 0)) * float(trade_data.get('price', 0)):,.2f}" if trade_data.get('quantity') and trade_data.get('price') else 'N/A', 
-                    "inline": True
-                },
-                {
-                    "name": "手續費", 
-                    "value": f"${float(trade_data.get('commission', 0)):.4f}" if trade_data.get('commission') else 'N/A', 
-                    "inline": True
-                },
-                {
-                    "name": "策略", 
-                    "value": trade_data.get('strategy', 'N/A'), 
-                    "inline": True
-                },
-                {
-                    "name": "訂單 ID", 
-                    "value": str(trade_data.get('order_id', 'N/A')), 
-                    "inline": True
-                },
-                {
-                    "name": "時間", 
-                    "value": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 
-                    "inline": False
-                }
-            ],
-            "timestamp": datetime.now().isoformat(),
-            "footer": {
-                "text": f"Binance Trading Bot | {self.trading_mode}",
-                "icon_url": "https://cryptologos.cc/logos/binance-coin-bnb-logo.png"
-            }
+            "title": f"{prefix} 交易執行 - {emoji} {side}",
+            "color": self._SIDE_COLORS.get(side, 0xff0000),
+            "fields": fields,
+            "timestamp": now.isoformat(timespec="seconds"),
+            "footer": self._footers["Binance Trading Bot"]
         }
         
         # 添加交易模式說明
@@ -159,7 +288,7 @@ class DiscordNotifier:
         else:
             embed["description"] = "🔴 **真實交易警告** - 涉及真實資金"
         
-        return self.send_message("", embed)
+        return self._enqueue(self._build_payload("", embed))
     
     def send_strategy_signal(self, signal_data: Dict[str, Any]) -> bool:
         """發送策略信號通知"""
@@ -171,28 +300,19 @@ class DiscordNotifier:
         reason = signal_data.get('reason', 'N/A')
         confidence = signal_data.get('confidence', 0)
         
-        emoji_map = {
-            'BUY': '🟢',
-            'SELL': '🔴',
-            'HOLD': '🟡',
-            'UNKNOWN': '⚪'
-        }
-        
+        now = datetime.now()
         embed = {
-            "title": f"📊 策略信號 - {emoji_map.get(signal_type, '⚪')} {signal_type}",
-            "color": 0x00ff00 if signal_type == 'BUY' else 0xff0000 if signal_type == 'SELL' else 0xffff00,
+            "title": f"📊 策略信號 - {self._SIGNAL_EMOJI.get(signal_type, '⚪')} {signal_type}",
+            "color": self._SIDE_COLORS.get(signal_type, 0xffff00),
             "fields": [
                 {"name": "交易模式", "value": self.trading_mode, "inline": True},
                 {"name": "交易對", "value": symbol, "inline": True},
                 {"name": "信號強度", "value": f"{confidence:.2%}", "inline": True},
                 {"name": "信號原因", "value": reason, "inline": False},
-                {"name": "時間", "value": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "inline": False}
+                {"name": "時間", "value": now.strftime("%Y-%m-%d %H:%M:%S"), "inline": False}
             ],
-            "timestamp": datetime.now().isoformat(),
-            "footer": {
-                "text": f"Strategy Signal | {self.trading_mode}",
-                "icon_url": "https://cryptologos.cc/logos/binance-coin-bnb-logo.png"
-            }
+            "timestamp": now.isoformat(timespec="seconds"),
+            "footer": self._footers["Strategy Signal"]
         }
         
         return self.send_message("", embed)
@@ -202,105 +322,59 @@ class DiscordNotifier:
         if not self.enabled:
             return False
         
+        # 標題與格式化函式已預先建立，每次只格式化數值
+        fields = [
+            {"name": name, "value": fmt(float(portfolio_data.get(key, 0))), "inline": True}
+            for name, key, fmt in _PORTFOLIO_VALUE_FIELDS
+        ]
+        fields.append({"name": "活躍持倉", "value": str(portfolio_data.get('active_positions', 0)), "inline": True})
+        
         embed = {
-            "title": f"💼 投資組合更新 ({self.trading_mode})",
+            "title": self._portfolio_title,
             "color": 0x1e90ff,
-            "fields": [
-                {
-                    "name": "總資產價值", 
-                    "value": f"${float(portfolio_data.get('total_value', 0)):,.2f}", 
-                    "inline": True
-                },
-                {
-                    "name": "可用餘額", 
-                    "value": f"${float(portfolio_data.get('available_balance', 0)):,.2f}", 
-                    "inline": True
-                },
-                {
-                    "name": "未實現盈虧", 
-                    "value": f"${float(portfolio_data.get('unrealized_pnl', 0)):+,.4f}", 
-                    "inline": True
-                },
-                {
-                    "name": "今日盈虧", 
-                    "value": f"${float(portfolio_data.get('daily_pnl', 0)):+,.4f}", 
-                    "inline": True
-                },
-                {
-                    "name": "總盈虧百分比", 
-                    "value": f"{float(portfolio_data.get('pnl_percentage', 0)):+.2f}%", 
-                    "inline": True
-                },
-                {
-                    "name": "活躍持倉", 
-                    "value": str(portfolio_data.get('active_positions', 0)), 
-                    "inline": True
-                }
-            ],
-            "timestamp": datetime.now().isoformat(),
-            "footer": {
-                "text": f"Portfolio Update | {self.trading_mode}",
-                "icon_url": "https://cryptologos.cc/logos/binance-coin-bnb-logo.png"
-            }
+            "fields": fields,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "footer": self._footers["Portfolio Update"]
         }
         
-        return self.send_message("", embed)
+        return self._enqueue(self._build_payload("", embed))
     
     def send_system_alert(self, message: str, level: str = "info") -> bool:
         """發送系統警告通知"""
         if not self.enabled:
             return False
         
-        emoji_map = {
-            "info": "ℹ️",
-            "success": "✅",
-            "warning": "⚠️", 
-            "error": "❌",
-            "critical": "🚨"
-        }
-        
-        color_map = {
-            "info": 0x3498db,
-            "success": 0x2ecc71,
-            "warning": 0xf39c12,
-            "error": 0xe74c3c,
-            "critical": 0x8b0000
-        }
-        
-        embed = {
-            "title": f"{emoji_map.get(level, 'ℹ️')} 系統通知",
+        return self.send_message("", self._system_alert_embed(message, level))
+    
+    def _system_alert_embed(self, message: str, level: str) -> Dict[str, Any]:
+        now = datetime.now()
+        return {
+            "title": f"{self._ALERT_EMOJI.get(level, 'ℹ️')} 系統通知",
             "description": message,
-            "color": color_map.get(level, 0x3498db),
+            "color": self._ALERT_COLORS.get(level, 0x3498db),
             "fields": [
                 {"name": "交易模式", "value": self.trading_mode, "inline": True},
                 {"name": "警告等級", "value": level.upper(), "inline": True}
             ],
-            "timestamp": datetime.now().isoformat(),
-            "footer": {
-                "text": f"System Alert | {self.trading_mode}",
-                "icon_url": "https://cryptologos.cc/logos/binance-coin-bnb-logo.png"
-            }
+            "timestamp": now.isoformat(timespec="seconds"),
+            "footer": self._footers["System Alert"]
         }
-        
-        return self.send_message("", embed)
     
     def send_startup_notification(self) -> bool:
         """發送系統啟動通知"""
         if not self.enabled:
             return False
         
+        now = datetime.now()
         embed = {
             "title": "🚀 Binance Trading Bot 已啟動",
             "color": 0x00ff00,
             "fields": [
                 {"name": "交易模式", "value": self.trading_mode, "inline": True},
-                {"name": "時間", "value": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "inline": True}
+                {"name": "時間", "value": now.strftime("%Y-%m-%d %H:%M:%S"), "inline": True}
             ],
-            "timestamp": datetime.now().isoformat(),
-            "footer": {
-                "text": f"Bot Startup | {self.trading_mode}",
-                "icon_url": "https://cryptologos.cc/logos/binance-coin-bnb-logo.png"
-            }
+            "timestamp": now.isoformat(timespec="seconds"),
+            "footer": self._footers["Bot Startup"]
         }
         
         if self.trading_mode in ["🎮 Demo 模式", "📋 紙上交易"]:
@@ -313,13 +387,14 @@ class DiscordNotifier:
         return self.send_message("", embed)
     
     def test_webhook(self) -> bool:
-        """測試 webhook 連接"""
-        return self.send_system_alert(
+        """測試 webhook 連接（同步送出，回傳實際結果）"""
+        if not self.enabled:
+            return False
+        return self._post(self._build_payload("", self._system_alert_embed(
             f"Discord webhook 測試成功！當前交易模式: {self.trading_mode}", 
             "success"
-        )
+        )))
 
 
 # 全域通知器實例
-import os
 discord_notifier = DiscordNotifier()
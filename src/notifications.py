@@ -4,14 +4,26 @@ Notification system for trading bot alerts
 import asyncio
 import json
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List, Tuple
 from enum import Enum
-import requests
+import aiohttp
 from loguru import logger
 
 from .config import config
 
 
+# HTTP settings for the notification channels
+NOTIFICATION_TIMEOUT = 10
+NOTIFICATION_MAX_CONNECTIONS = 32
+NOTIFICATION_MAX_CONNECTIONS_PER_HOST = 8
+NOTIFICATION_DNS_CACHE_TTL = 300
+NOTIFICATION_KEEPALIVE_TIMEOUT = 75
+
+# Per-message limits of the channels
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+DISCORD_MAX_EMBEDS = 10
+
+
 class NotificationType(Enum):
     """Notification types"""
     INFO = "info"
@@ -21,6 +33,38 @@ class NotificationType(Enum):
     RISK = "risk"
 
 
+# Emoji prefix per notification type for Telegram
+TELEGRAM_EMOJI = {
+    NotificationType.INFO: "ℹ️",
+    NotificationType.WARNING: "⚠️",
+    NotificationType.ERROR: "❌",
+    NotificationType.TRADE: "💰",
+    NotificationType.RISK: "🚨"
+}
+
+# Embed color per notification type for Discord
+DISCORD_COLORS = {
+    NotificationType.INFO: 0x3498db,      # Blue
+    NotificationType.WARNING: 0xf39c12,   # Orange
+    NotificationType.ERROR: 0xe74c3c,     # Red
+    NotificationType.TRADE: 0x2ecc71,     # Green
+    NotificationType.RISK: 0x9b59b6       # Purple
+}
+
+
+def _join_messages(texts: List[str], max_length: int) -> Iterator[str]:
+    """Join texts into as few messages as possible, each at most max_length long"""
+    current = ""
+    for text in texts:
+        if current and len(current) + 2 + len(text) > max_length:
+            yield current
+            current = text
+        else:
+            current = f"{current}\n\n{text}" if current else text
+    if current:
+        yield current
+
+
 class NotificationManager:
     """Manages various notification channels"""
     
@@ -30,115 +74,208 @@ class NotificationManager:
             config.notifications.telegram_chat_id
         )
         self.discord_enabled = bool(config.notifications.discord_webhook)
+        # Created lazily because an aiohttp session must be built inside a running event loop;
+        # it is kept open between notifications so Telegram/Discord connections stay warm
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Notifications are queued and sent by a background task bound to the running loop
+        self._queue: Optional[asyncio.Queue] = None
+        self._drain_task: Optional[asyncio.Task] = None
+        self.flush_delay = config.notifications.notification_flush_delay
+    
+    async def _ensure_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use in the current loop"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            # A session bound to a finished loop (e.g. a previous asyncio.run) cannot be reused
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=NOTIFICATION_TIMEOUT),
+                connector=aiohttp.TCPConnector(
+                    limit=NOTIFICATION_MAX_CONNECTIONS,
+                    limit_per_host=NOTIFICATION_MAX_CONNECTIONS_PER_HOST,
+                    ttl_dns_cache=NOTIFICATION_DNS_CACHE_TTL,
+                    keepalive_timeout=NOTIFICATION_KEEPALIVE_TIMEOUT,
+                    enable_cleanup_closed=True
+                )
+            )
+            self._session_loop = loop
+        return self._session
+    
+    def _ensure_queue(self) -> asyncio.Queue:
+        """Return the notification queue, starting its drain task in the current loop"""
+        loop = asyncio.get_running_loop()
+        if self._drain_task is None or self._drain_task.done() or self._drain_task.get_loop() is not loop:
+            # Notifications left behind by a drain task on another loop move to the new queue
+            pending = self._take_pending()
+            if pending:
+                logger.warning(f"Notification loop changed; carrying over {len(pending)} pending notifications")
+            self._queue = asyncio.Queue()
+            for item in pending:
+                self._queue.put_nowait(item)
+            self._drain_task = loop.create_task(self._drain(self._queue))
+        return self._queue
+    
+    def _take_pending(self) -> List[Tuple[str, NotificationType, Optional[Dict[str, Any]]]]:
+        """Remove and return the notifications still waiting in the current queue"""
+        items = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                items.append(self._queue.get_nowait())
+                self._queue.task_done()
+        return items
+    
+    async def aclose(self) -> None:
+        """Flush pending notifications and close the shared HTTP session"""
+        task = self._drain_task
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            await self._queue.join()
+            task.cancel()
+        else:
+            # The drain task belongs to another (usually finished) loop; send what it left from here
+            pending = self._take_pending()
+            if pending:
+                logger.warning(f"Flushing {len(pending)} notifications left by a previous event loop")
+                await self._flush(pending)
+        self._drain_task = None
+        self._queue = None
+        
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            self._session_loop = None
         
     async def send_notification(self, message: str, 
                               notification_type: NotificationType = NotificationType.INFO,
                               data: Optional[Dict[str, Any]] = None) -> None:
-        """Send notification through all configured channels"""
+        """Queue a notification for all configured channels"""
         try:
             # Format message with timestamp
             timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
             formatted_message = f"[{timestamp}] {message}"
             
-            # Send to all enabled channels
-            tasks = []
-            
-            if self.telegram_enabled:
-                tasks.append(self._send_telegram(formatted_message, notification_type, data))
-            
-            if self.discord_enabled:
-                tasks.append(self._send_discord(formatted_message, notification_type, data))
-            
-            if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
+            if self.telegram_enabled or self.discord_enabled:
+                # Sent by the drain task so bursts share one request per channel
+                self._ensure_queue().put_nowait((formatted_message, notification_type, data))
             else:
                 logger.info(f"Notification: {formatted_message}")
                 
         except Exception as e:
             logger.error(f"Error sending notification: {e}")
     
+    async def _drain(self, queue: asyncio.Queue) -> None:
+        """Send queued notifications, coalescing those that arrive together"""
+        while True:
+            items = [await queue.get()]
+            # Only wait for the rest of a burst when one is already under way
+            if not queue.empty() and self.flush_delay > 0:
+                await asyncio.sleep(self.flush_delay)
+            while not queue.empty():
+                items.append(queue.get_nowait())
+            
+            try:
+                await self._flush(items)
+            except Exception as e:
+                logger.error(f"Error flushing notifications: {e}")
+            finally:
+                for _ in items:
+                    queue.task_done()
+    
+    async def _flush(self, items: List[Tuple[str, NotificationType, Optional[Dict[str, Any]]]]) -> None:
+        """Send a batch as one Telegram message and as few Discord messages as possible"""
+        tasks = []
+        
+        if self.telegram_enabled:
+            texts = [self._telegram_text(*item) for item in items]
+            tasks.extend(self._post_telegram(text) for text in _join_messages(texts, TELEGRAM_MAX_MESSAGE_LENGTH))
+        
+        if self.discord_enabled:
+            embeds = [self._discord_embed(*item) for item in items]
+            tasks.extend(
+                self._post_discord(embeds[i:i + DISCORD_MAX_EMBEDS])
+                for i in range(0, len(embeds), DISCORD_MAX_EMBEDS)
+            )
+        
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
     async def _send_telegram(self, message: str, notification_type: NotificationType,
                            data: Optional[Dict[str, Any]] = None) -> None:
         """Send notification via Telegram"""
-        try:
-            # Add emoji based on notification type
-            emoji_map = {
-                NotificationType.INFO: "ℹ️",
-                NotificationType.WARNING: "⚠️",
-                NotificationType.ERROR: "❌",
-                NotificationType.TRADE: "💰",
-                NotificationType.RISK: "🚨"
+        await self._post_telegram(self._telegram_text(message, notification_type, data))
+    
+    async def _send_discord(self, message: str, notification_type: NotificationType,
+                          data: Optional[Dict[str, Any]] = None) -> None:
+        """Send notification via Discord webhook"""
+        await self._post_discord([self._discord_embed(message, notification_type, data)])
+    
+    @staticmethod
+    def _telegram_text(message: str, notification_type: NotificationType,
+                       data: Optional[Dict[str, Any]] = None) -> str:
+        """Format a notification as Telegram Markdown text"""
+        emoji = TELEGRAM_EMOJI.get(notification_type, "📢")
+        formatted_message = f"{emoji} {message}"
+        
+        # Add data if provided
+        if data:
+            formatted_message += f"\n\n```json\n{json.dumps(data, indent=2, default=str)}\n```"
+        
+        return formatted_message
+    
+    @staticmethod
+    def _discord_embed(message: str, notification_type: NotificationType,
+                       data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Format a notification as a Discord embed"""
+        embed = {
+            "title": f"Trading Bot {notification_type.value.title()}",
+            "description": message,
+            "color": DISCORD_COLORS.get(notification_type, 0x95a5a6),  # Gray default
+            "timestamp": datetime.utcnow().isoformat(),
+            "footer": {
+                "text": "Binance Trading Bot"
             }
-            
-            emoji = emoji_map.get(notification_type, "📢")
-            formatted_message = f"{emoji} {message}"
-            
-            # Add data if provided
-            if data:
-                formatted_message += f"\n\n```json\n{json.dumps(data, indent=2, default=str)}\n```"
-            
+        }
+        
+        # Add data as fields if provided
+        if data:
+            embed["fields"] = [
+                {
+                    "name": key.replace("_", " ").title(),
+                    "value": str(value),
+                    "inline": True
+                }
+                for key, value in data.items()
+            ]
+        
+        return embed
+    
+    async def _post_telegram(self, text: str) -> None:
+        try:
             url = f"https://api.telegram.org/bot{config.notifications.telegram_bot_token}/sendMessage"
             
             payload = {
                 "chat_id": config.notifications.telegram_chat_id,
-                "text": formatted_message,
+                "text": text,
                 "parse_mode": "Markdown",
                 "disable_web_page_preview": True
             }
             
-            response = requests.post(url, json=payload, timeout=10)
-            response.raise_for_status()
+            session = await self._ensure_session()
+            async with session.post(url, json=payload) as response:
+                response.raise_for_status()
             
             logger.debug("Telegram notification sent successfully")
             
         except Exception as e:
             logger.error(f"Failed to send Telegram notification: {e}")
     
-    async def _send_discord(self, message: str, notification_type: NotificationType,
-                          data: Optional[Dict[str, Any]] = None) -> None:
-        """Send notification via Discord webhook"""
+    async def _post_discord(self, embeds: List[Dict[str, Any]]) -> None:
         try:
-            # Color based on notification type
-            color_map = {
-                NotificationType.INFO: 0x3498db,      # Blue
-                NotificationType.WARNING: 0xf39c12,   # Orange
-                NotificationType.ERROR: 0xe74c3c,     # Red
-                NotificationType.TRADE: 0x2ecc71,     # Green
-                NotificationType.RISK: 0x9b59b6       # Purple
-            }
-            
-            color = color_map.get(notification_type, 0x95a5a6)  # Gray default
-            
-            embed = {
-                "title": f"Trading Bot {notification_type.value.title()}",
-                "description": message,
-                "color": color,
-                "timestamp": datetime.utcnow().isoformat(),
-                "footer": {
-                    "text": "Binance Trading Bot"
-                }
-            }
-            
-            # Add data as fields if provided
-            if data:
-                embed["fields"] = []
-                for key, value in data.items():
-                    embed["fields"].append({
-                        "name": key.replace("_", " ").title(),
-                        "value": str(value),
-                        "inline": True
-                    })
-            
             payload = {
-                "embeds": [embed]
+                "embeds": embeds
             }
             
-            response = requests.post(
-                config.notifications.discord_webhook, 
-                json=payload, 
-                timeout=10
-            )
-            response.raise_for_status()
+            session = await self._ensure_session()
+            async with session.post(config.notifications.discord_webhook, json=payload) as response:
+                response.raise_for_status()
             
             logger.debug("Discord notification sent successfully")
             
@@ -2,8 +2,13 @@
 """
 紙上交易客戶端 - 使用真實 API 數據但虛擬資金
 """
+import json
+import os
 import time
+from collections import deque
 from datetime import datetime
+from itertools import islice
+from pathlib import Path
 from typing import Dict, List, Any, Optional, Union
 from loguru import logger
 
@@ -16,6 +21,22 @@ except ImportError:
     BINANCE_AVAILABLE = False
 
 from .config import config
+from .rate_limiter import REQUEST_WEIGHTS, get_request_bucket
+from .ttl_cache import TTLCache
+
+
+# 虛擬訂單最多保留筆數，超過時自動淘汰最舊的訂單
+MAX_PAPER_ORDERS = 10_000
+
+# 全市場價格快照的有效秒數，期間內的持倉盈虧更新共用同一份價格
+PRICE_MAP_TTL = 1.0
+# 單一交易對價格快取的有效秒數，同一時間點連續下單不重複請求
+MARK_PRICE_TTL = 0.5
+
+# 交易所信息幾乎不變（約 1 MB），記憶體與磁碟快取的有效秒數
+EXCHANGE_INFO_TTL = 3600.0
+# 磁碟快取目錄，重新啟動後在有效期內不必重新下載
+EXCHANGE_INFO_CACHE_DIR = Path.home() / '.cache' / 'binance-trading-bot'
 
 
 class PaperTradingClient:
@@ -45,7 +66,7 @@ class PaperTradingClient:
         # 同步時間
         try:
             server_time = self.real_client.get_server_time()
-            local_time = int(time.time() * 1000) + config.binance.time_offset
+            local_time = time.time_ns() // 1_000_000 + config.binance.time_offset
             calculated_offset = server_time['serverTime'] - local_time
             self.time_offset = calculated_offset
             logger.info(f"Paper trading - Server time offset: {calculated_offset}ms")
@@ -58,21 +79,36 @@ class PaperTradingClient:
             'USDT': {'free': 10000.0, 'locked': 0.0, 'total': 10000.0}
         }
         self.paper_positions = {}
-        self.paper_orders = []
+        self.paper_orders: deque = deque(maxlen=MAX_PAPER_ORDERS)
         self.trade_history = []
         self.order_id_counter = 1
-        self.last_request_time = 0
-        self.request_interval = 0.1  # 100ms between requests
+        
+        # 全市場最新價格快照（symbol -> price）與取得時間（monotonic）
+        self._price_map: Dict[str, float] = {}
+        self._price_map_at = 0.0
+        self._ticker_ttl = PRICE_MAP_TTL
+        self._mark_price_cache = TTLCache(maxsize=512)
+        # 交易所信息快取：(取得時間 time.time(), info)；以牆鐘時間記錄，可與磁碟快取比較
+        self._xinfo_cache: Optional[tuple] = None
+        self._xinfo_ttl = EXCHANGE_INFO_TTL
+        self._xinfo_path = EXCHANGE_INFO_CACHE_DIR / (
+            f"exchange_info{'_testnet' if config.binance.testnet else ''}.json"
+        )
+        
+        # 預先取得全市場價格，首筆下單與持倉查詢不必再等待
+        try:
+            self._get_price_map()
+        except Exception as e:
+            logger.warning(f"Failed to pre-warm paper trading prices: {e}")
         
         logger.info(f"📋 紙上交易模式已啟動 - 使用真實 {self.trading_type} 市場數據，虛擬資金交易")
     
-    def _rate_limit(self):
-        """簡單的速率限制"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.request_interval:
-            time.sleep(self.request_interval - time_since_last)
-        self.last_request_time = time.time()
+    def _rate_limit(self, weight: int = 1):
+        """經由 BinanceClient 呼叫的方法已由其扣除權重，這裡不重複等待"""
+    
+    def _acquire_weight(self, weight: int) -> None:
+        """內部自行發出的請求（價格快照等）向共用 token bucket 取得權重"""
+        get_request_bucket().acquire(weight)
     
     # ========== 真實市場數據方法 ==========
     
@@ -107,8 +143,9 @@ class PaperTradingClient:
                 symbol=symbol,
                 interval=interval,
                 limit=limit,
-                startTime=int(start_time.timestamp() * 1000) if start_time else None,
-                endTime=int(end_time.timestamp() * 1000) if end_time else None
+                # BinanceClient 已轉換為整數毫秒
+                startTime=start_time,
+                endTime=end_time
             )
             
             return klines
@@ -117,13 +154,42 @@ class PaperTradingClient:
             raise
     
     def get_exchange_info(self) -> Dict[str, Any]:
-        """獲取真實交易所信息"""
+        """獲取真實交易所信息（記憶體與磁碟快取 _xinfo_ttl 秒）"""
+        cached = self._xinfo_cache or self._load_exchange_info()
+        if cached and time.time() - cached[0] < self._xinfo_ttl:
+            self._xinfo_cache = cached
+            return cached[1]
+        
         self._rate_limit()
         try:
-            return self.real_client.get_exchange_info()
+            info = self.real_client.get_exchange_info()
         except BinanceAPIException as e:
             logger.error(f"Failed to get exchange info: {e}")
             raise
+        
+        self._xinfo_cache = (time.time(), info)
+        self._save_exchange_info(*self._xinfo_cache)
+        return info
+    
+    def _load_exchange_info(self) -> Optional[tuple]:
+        """讀取磁碟上的交易所信息快取，不存在或損毀時回傳 None"""
+        try:
+            with open(self._xinfo_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data['fetched_at'], data['info']
+        except (OSError, ValueError, KeyError):
+            return None
+    
+    def _save_exchange_info(self, fetched_at: float, info: Dict[str, Any]) -> None:
+        """寫入磁碟快取；先寫暫存檔再替換，避免其他行程讀到不完整的檔案"""
+        try:
+            self._xinfo_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._xinfo_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'fetched_at': fetched_at, 'info': info}, f)
+            os.replace(tmp_path, self._xinfo_path)
+        except OSError as e:
+            logger.warning(f"Failed to write exchange info cache: {e}")
     
     # ========== 虛擬帳戶和交易方法 ==========
     
@@ -143,7 +209,7 @@ class PaperTradingClient:
             'canTrade': True,
             'canWithdraw': False,  # 紙上交易不能提現
             'canDeposit': False,   # 紙上交易不能充值
-            'updateTime': int(time.time() * 1000)
+            'updateTime': time.time_ns() // 1_000_000
         }
     
     def get_balance(self, asset: Optional[str] = None) -> Union[Dict[str, float], Dict[str, Dict[str, float]]]:
@@ -186,7 +252,7 @@ class PaperTradingClient:
             'totalPositionInitialMargin': '0.00',
             'totalUnrealizedProfit': '0.00',
             'totalWalletBalance': str(self.paper_balance.get('USDT', {}).get('total', 0)),
-            'updateTime': int(time.time() * 1000)
+            'updateTime': time.time_ns() // 1_000_000
         }
     
     def get_futures_balance(self, asset: Optional[str] = None) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
@@ -202,7 +268,7 @@ class PaperTradingClient:
                 'availableBalance': str(balance['free']),
                 'maxWithdrawAmount': str(balance['free']),
                 'marginAvailable': True,
-                'updateTime': int(time.time() * 1000)
+                'updateTime': time.time_ns() // 1_000_000
             }
         else:
             balances = []
@@ -216,7 +282,7 @@ class PaperTradingClient:
                     'availableBalance': str(balance['free']),
                     'maxWithdrawAmount': str(balance['free']),
                     'marginAvailable': True,
-                    'updateTime': int(time.time() * 1000)
+                    'updateTime': time.time_ns() // 1_000_000
                 })
             return balances
     
@@ -235,7 +301,7 @@ class PaperTradingClient:
                     'markPrice': str(position['mark_price']),
                     'unRealizedProfit': str(position['unrealized_pnl']),
                     'positionSide': position['side'],
-                    'updateTime': int(time.time() * 1000)
+                    'updateTime': time.time_ns() // 1_000_000
                 })
         return positions
     
@@ -257,8 +323,7 @@ class PaperTradingClient:
         
         # 獲取當前真實市場價格
         try:
-            ticker = self.get_24hr_ticker(symbol)
-            current_price = float(ticker.get('lastPrice', ticker.get('price', 50000)))
+            current_price = self._get_mark_price(symbol)
         except Exception as e:
             logger.error(f"Failed to get current price for {symbol}: {e}")
             current_price = price or 50000.0  # 默認價格
@@ -291,12 +356,12 @@ class PaperTradingClient:
             'side': side,
             'stopPrice': '0.00000000',
             'icebergQty': '0.00000000',
-            'time': int(time.time() * 1000),
-            'updateTime': int(time.time() * 1000),
+            'time': time.time_ns() // 1_000_000,
+            'updateTime': time.time_ns() // 1_000_000,
             'isWorking': False,
             'origQuoteOrderQty': '0.00000000',
             'commission': str(commission),
-            'transactTime': int(time.time() * 1000)
+            'transactTime': time.time_ns() // 1_000_000
         }
         
         # 更新虛擬餘額和持倉
@@ -375,26 +440,52 @@ class PaperTradingClient:
             'status': 'CANCELED'
         }
     
+    def _get_price_map(self) -> Dict[str, float]:
+        """全市場最新價格，一次請求取得所有交易對，於 _ticker_ttl 秒內重複使用"""
+        now = time.monotonic()
+        if now - self._price_map_at >= self._ticker_ttl:
+            self._acquire_weight(REQUEST_WEIGHTS['ticker_price_all'])
+            tickers = self.real_client.get_symbol_ticker()
+            self._price_map = {ticker['symbol']: float(ticker['price']) for ticker in tickers}
+            self._price_map_at = now
+        return self._price_map
+    
+    def _get_mark_price(self, symbol: str) -> float:
+        """交易對的最新價格，優先使用仍有效的全市場快照或單一交易對快取"""
+        if time.monotonic() - self._price_map_at < self._ticker_ttl:
+            price = self._price_map.get(symbol)
+            if price is not None:
+                return price
+        
+        price = self._mark_price_cache.get(symbol, MARK_PRICE_TTL)
+        if price is None:
+            self._acquire_weight(REQUEST_WEIGHTS['ticker_price'])
+            price = float(self.real_client.get_symbol_ticker(symbol=symbol)['price'])
+            self._mark_price_cache.set(symbol, price)
+        return price
+    
     def _update_positions_pnl(self) -> None:
         """更新持倉的未實現盈虧"""
+        if not self.paper_positions:
+            return
+        
+        # 所有持倉共用同一次全市場價格請求，不再逐一查詢
+        try:
+            prices = self._get_price_map()
+        except Exception as e:
+            logger.warning(f"Failed to get prices for PnL update: {e}")
+            prices = {}
+        
         for symbol, position in self.paper_positions.items():
-            try:
-                # 獲取當前市場價格
-                ticker = self.get_24hr_ticker(symbol)
-                current_price = float(ticker.get('lastPrice', ticker.get('price', position['entry_price'])))
-                
-                # 更新標記價格
-                position['mark_price'] = current_price
-                
-                # 計算未實現盈虧
-                entry_price = position['entry_price']
-                quantity = position['quantity']
-                pnl = (current_price - entry_price) * quantity
-                position['unrealized_pnl'] = pnl
-                
-            except Exception as e:
-                logger.warning(f"Failed to update PnL for {symbol}: {e}")
+            current_price = prices.get(symbol)
+            if current_price is None:
+                logger.warning(f"Failed to update PnL for {symbol}: no price")
                 position['unrealized_pnl'] = 0
+                continue
+            
+            # 更新標記價格並計算未實現盈虧
+            position['mark_price'] = current_price
+            position['unrealized_pnl'] = (current_price - position['entry_price']) * position['quantity']
     
     def get_trade_history(self) -> List[Dict[str, Any]]:
         """獲取交易歷史"""
@@ -433,6 +524,10 @@ class PaperTradingClient:
         """別名：get_24hr_ticker"""
         return self.get_24hr_ticker(symbol)
     
+    def recent_orders(self, limit: int) -> List[Dict[str, Any]]:
+        """最近的 limit 筆虛擬訂單（由舊到新），只走訪尾端 limit 筆"""
+        return list(islice(reversed(self.paper_orders), limit))[::-1]
+    
     def get_order(self, symbol: str, orderId: int) -> Dict[str, Any]:
         """查詢虛擬訂單"""
         for order in self.paper_orders:
@@ -453,7 +548,7 @@ class PaperTradingClient:
     def get_my_trades(self, symbol: str, limit: int = 100) -> List[Dict[str, Any]]:
         """獲取虛擬交易歷史"""
         trades = []
-        for order in self.paper_orders[-limit:]:
+        for order in self.recent_orders(limit):
             if order['symbol'] == symbol and order['status'] == 'FILLED':
                 trades.append({
                     'id': order['orderId'],
@@ -463,7 +558,7 @@ class PaperTradingClient:
                     'qty': order['executedQty'],
                     'price': order['price'],
                     'commission': order.get('commission', '0'),
-                    'time': order.get('transactTime', int(time.time() * 1000))
+                    'time': order.get('transactTime', time.time_ns() // 1_000_000)
                 })
         return trades
     
@@ -491,6 +586,18 @@ class PaperTradingClient:
             'status': 'CANCELED'
         }
     
+    def futures_cancel_orders(self, **params) -> List[Dict[str, Any]]:
+        """批次取消虛擬合約訂單"""
+        symbol = params.get('symbol')
+        return [
+            self.futures_cancel_order(symbol=symbol, orderId=order_id)
+            for order_id in json.loads(params.get('orderIdList', '[]'))
+        ]
+    
+    def futures_cancel_all_open_orders(self, **params) -> Dict[str, Any]:
+        """取消虛擬合約的所有未成交訂單（紙上交易中所有訂單都立即成交）"""
+        return {'code': 200, 'msg': 'The operation of cancel all open order is done.'}
+    
     def futures_get_open_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
         """別名：get_open_orders for futures"""
         return self.get_open_orders(symbol)
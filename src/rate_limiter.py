@@ -0,0 +1,90 @@
+"""
+Token bucket rate limiter driven by Binance request weights
+"""
+import asyncio
+import threading
+import time
+from functools import cache
+
+from .config import get_config
+
+
+# Binance 各端點的請求權重（以 USDⓈ-M 期貨文件為準）
+REQUEST_WEIGHTS = {
+    'account': 5,
+    'ticker_24hr': 1,
+    'ticker_24hr_all': 40,
+    'ticker_24hr_batch': 2,
+    'ticker_price': 1,
+    'ticker_price_all': 2,
+    'exchange_info': 10,
+    'open_orders_all': 40,
+    'position_risk': 5,
+    'my_trades': 5,
+}
+
+
+# 回應標頭：目前 IP 在本分鐘內已使用的請求權重
+USED_WEIGHT_HEADER = 'X-MBX-USED-WEIGHT-1M'
+
+
+def klines_weight(limit: int) -> int:
+    """Request weight of the klines endpoint for a given limit"""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing bursts up to capacity, refilled at a fixed rate"""
+
+    __slots__ = ('tokens', 'capacity', 'refill_rate', 'last', '_lock')
+
+    def __init__(self, capacity: float, refill_rate: float):
+        self.capacity = float(capacity)
+        self.refill_rate = float(refill_rate)
+        self.tokens = float(capacity)
+        self.last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, n: float = 1) -> float:
+        """Reserve n tokens and return how long the caller must wait (0 if available now)"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.refill_rate)
+            self.last = now
+            # 先扣除再計算等待時間，令牌可暫時為負，確保併發呼叫者依序排隊
+            self.tokens -= n
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.refill_rate
+
+    def sync_used_weight(self, used: int, limit: int) -> None:
+        """Align the bucket with the server-reported weight already used this minute"""
+        with self._lock:
+            # 伺服器端剩餘額度較少時（其他行程或實例共用同一 IP）以其為準，不足時呼叫者將排隊等待
+            self.tokens = min(self.tokens, float(limit - used))
+
+    def acquire(self, n: float = 1) -> None:
+        """Block until n tokens are available"""
+        wait = self.consume(n)
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self, n: float = 1) -> None:
+        """Wait without blocking the event loop until n tokens are available"""
+        wait = self.consume(n)
+        if wait:
+            await asyncio.sleep(wait)
+
+
+@cache
+def get_request_bucket() -> TokenBucket:
+    """Get the process-wide request weight bucket, created on first use"""
+    # Binance 權重限制以 IP 計算，所有客戶端實例（含紙上交易客戶端的內部請求）共用同一個 token bucket
+    binance = get_config().binance
+    return TokenBucket(binance.rate_limit_capacity, binance.rate_limit_per_second)
@@ -6,7 +6,7 @@ import os
 import asyncio
 import time
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Set
+from typing import List, Dict, Any, Optional, Set, AbstractSet
 from dataclasses import dataclass
 
 try:
@@ -40,6 +40,7 @@ class SymbolDiscovery:
     def __init__(self):
         self.last_update_time = None
         self.cached_symbols = []
+        self.whitelist: AbstractSet[str] = config.trading.whitelist
         self.excluded_symbols = self._get_excluded_symbols()
         self.update_interval = int(os.getenv("UPDATE_SYMBOLS_INTERVAL", "1800"))  # 30 minutes
         
@@ -56,8 +57,7 @@ class SymbolDiscovery:
             excluded.update(stablecoins)
         
         # Add user-defined blacklist
-        if hasattr(config.trading, 'blacklist') and config.trading.blacklist:
-            excluded.update(config.trading.blacklist)
+        excluded.update(config.trading.blacklist)
             
         # Known problematic or delisted coins
         problematic = {
@@ -175,8 +175,8 @@ class SymbolDiscovery:
             return False
         
         # Apply whitelist if specified
-        if hasattr(config.trading, 'whitelist') and config.trading.whitelist:
-            return metrics.symbol in config.trading.whitelist
+        if self.whitelist:
+            return metrics.symbol in self.whitelist
         
         # Minimum volume requirement
         min_volume = float(os.getenv("MIN_DAILY_VOLUME_USD", "10000000"))
@@ -10,7 +10,7 @@ from loguru import logger
 
 from .config import config
 from .binance_client import binance_client
-from .data_manager_fixed import data_manager
+from .data_manager import get_data_manager
 from .risk_manager import risk_manager
 from .strategies import get_strategy, Signal
 from .database.models import (
@@ -82,6 +82,9 @@ class TradingEngine:
                         trading_session.status = "STOPPED"
                         session.commit()
             
+            # 關閉市場數據更新共用的非同步連線
+            await get_data_manager().aclose()
+            
             logger.info("Trading engine stopped")
             
         except Exception as e:
@@ -94,7 +97,7 @@ class TradingEngine:
             risk_manager.initialize_session()
             
             # Update symbol information
-            data_manager.update_symbol_info()
+            get_data_manager().update_symbol_info()
             
             # Get symbols to monitor
             self.monitored_symbols = self._get_monitored_symbols()
@@ -194,14 +197,16 @@ class TradingEngine:
             )
             
             # Apply whitelist/blacklist filters
+            whitelist = config.trading.whitelist
+            blacklist = config.trading.blacklist
             filtered_symbols = []
             for symbol in active_symbols:
                 # Apply whitelist
-                if config.trading.whitelist and symbol not in config.trading.whitelist:
+                if whitelist and symbol not in whitelist:
                     continue
                 
                 # Apply blacklist
-                if config.trading.blacklist and symbol in config.trading.blacklist:
+                if symbol in blacklist:
                     continue
                 
                 filtered_symbols.append(symbol)
@@ -221,16 +226,14 @@ class TradingEngine:
             
             logger.info("Ensuring market data availability...")
             
-            for symbol in self.monitored_symbols:
-                for timeframe in required_timeframes:
-                    success = data_manager.ensure_data_availability(
-                        symbol, timeframe, required_periods
-                    )
-                    if not success:
-                        logger.warning(f"Could not ensure data for {symbol} {timeframe}")
-                
-                # Small delay to avoid overwhelming the API
-                await asyncio.sleep(0.1)
+            # 一次查詢所有組合的現有資料量，只對不足的組合呼叫 API（速率由共用的權重 token bucket 控制）
+            results = await asyncio.to_thread(
+                get_data_manager().ensure_data_availability_many,
+                self.monitored_symbols, required_timeframes, required_periods
+            )
+            for (symbol, timeframe), success in results.items():
+                if not success:
+                    logger.warning(f"Could not ensure data for {symbol} {timeframe}")
             
             logger.info("Market data check completed")
             
@@ -243,7 +246,7 @@ class TradingEngine:
             required_timeframes = self.strategy.get_required_timeframes()
             
             # Update data for all symbols (with rate limiting)
-            await data_manager.update_all_market_data(
+            await get_data_manager().update_all_market_data(
                 self.monitored_symbols, required_timeframes
             )
             
@@ -262,7 +265,7 @@ class TradingEngine:
                 try:
                     # Get market data for primary timeframe
                     primary_timeframe = required_timeframes[0]
-                    df = data_manager.get_market_data(
+                    df = get_data_manager().get_market_data(
                         symbol, primary_timeframe, limit=required_periods
                     )
                     
@@ -10,7 +10,7 @@ from loguru import logger
 
 from .config import config
 from .binance_client import binance_client
-from .data_manager_fixed import data_manager
+from .data_manager import data_manager
 from .risk_manager import risk_manager
 from .strategies import get_strategy, Signal
 from .database.models import (
@@ -0,0 +1,65 @@
+"""
+Size-bounded LRU cache whose entries expire after a per-lookup TTL
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+# K 線快取存活時間（秒），依各週期的資料更新節奏設定
+KLINE_CACHE_TTL = {
+    '1m': 15,
+    '3m': 30,
+    '5m': 60,
+    '15m': 180,
+    '30m': 300,
+    '1h': 600,
+    '2h': 900,
+    '4h': 1800,
+    '6h': 1800,
+    '8h': 1800,
+    '12h': 3600,
+    '1d': 3600,
+}
+DEFAULT_KLINE_CACHE_TTL = 15
+
+
+def kline_cache_ttl(interval: str) -> float:
+    """Cache TTL for klines of a given interval"""
+    return KLINE_CACHE_TTL.get(interval, DEFAULT_KLINE_CACHE_TTL)
+
+
+class TTLCache:
+    """Thread-safe LRU cache; entries older than the caller's TTL count as misses"""
+
+    __slots__ = ('maxsize', '_data', '_lock')
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, ttl: float) -> Optional[Any]:
+        """Return the cached value if younger than ttl seconds, else None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
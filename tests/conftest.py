@@ -0,0 +1,9 @@
+"""
+Shared pytest setup
+"""
+import os
+
+# 在任何 src 模組讀取設定之前指定測試環境，避免寫入本機資料庫或使用真實金鑰
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("BINANCE_API_KEY", "test_key")
+os.environ.setdefault("BINANCE_SECRET_KEY", "test_secret")
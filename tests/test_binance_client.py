@@ -0,0 +1,86 @@
+"""
+Tests for Binance client helpers
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from src import binance_client
+from src.binance_client import AsyncBinanceClient, _to_ms
+from src.rate_limiter import USED_WEIGHT_HEADER
+
+
+@pytest.fixture
+def local_timezone(monkeypatch):
+    """將行程本地時區暫時設為 UTC 以外的時區"""
+    monkeypatch.setenv("TZ", "Asia/Taipei")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_to_ms_passes_integers_through():
+    assert _to_ms(1700000000000) == 1700000000000
+
+
+def test_to_ms_treats_naive_datetimes_as_utc(local_timezone):
+    assert _to_ms(datetime(2023, 11, 14, 22, 13, 20)) == 1700000000000
+
+
+def test_to_ms_converts_aware_datetimes():
+    taipei = timezone(timedelta(hours=8))
+    assert _to_ms(datetime(2023, 11, 15, 6, 13, 20, tzinfo=taipei)) == 1700000000000
+    assert _to_ms(datetime(2023, 11, 14, 22, 13, 20, 500000, tzinfo=timezone.utc)) == 1700000000500
+
+
+class RecordingBucket:
+    def __init__(self):
+        self.calls = []
+
+    def sync_used_weight(self, used, limit):
+        self.calls.append((used, limit))
+
+
+@pytest.mark.parametrize("url, limit", [
+    ("https://fapi.binance.com/fapi/v1/klines", 2400),
+    ("https://api.binance.com/api/v3/klines", 6000),
+])
+def test_used_weight_is_checked_against_the_endpoint_limit(monkeypatch, url, limit):
+    bucket = RecordingBucket()
+    monkeypatch.setattr(binance_client, "get_request_bucket", lambda: bucket)
+    monkeypatch.setattr(binance_client.config.binance, "weight_limit_per_minute", None)
+
+    binance_client._sync_used_weight(SimpleNamespace(url=url, headers={USED_WEIGHT_HEADER: "150"}))
+    binance_client._sync_used_weight(SimpleNamespace(url=url, headers={}))
+    assert bucket.calls == [(150, limit)]
+
+
+def test_configured_weight_limit_overrides_defaults(monkeypatch):
+    monkeypatch.setattr(binance_client.config.binance, "weight_limit_per_minute", 1200)
+    assert binance_client.config.binance.get_weight_limit("spot") == 1200
+    assert binance_client.config.binance.get_weight_limit("futures") == 1200
+
+
+class RecordingAsyncBucket:
+    def __init__(self):
+        self.acquired = []
+
+    async def acquire_async(self, weight):
+        self.acquired.append(weight)
+
+
+def test_async_call_charges_the_bucket_when_delegating_to_sync_client(monkeypatch):
+    bucket = RecordingAsyncBucket()
+    monkeypatch.setattr(binance_client, "get_request_bucket", lambda: bucket)
+    client = AsyncBinanceClient.__new__(AsyncBinanceClient)
+    client._semaphore = asyncio.Semaphore(1)
+    # 紙上交易：AsyncBinanceClient 在執行緒中呼叫同步客戶端
+    client._sync_client = SimpleNamespace(client=SimpleNamespace(get_klines=lambda **kwargs: [kwargs["symbol"]]))
+
+    result = asyncio.run(client._call("get_klines", weight=5, symbol="BTCUSDT"))
+    assert result == ["BTCUSDT"]
+    assert bucket.acquired == [5]
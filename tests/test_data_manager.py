@@ -0,0 +1,171 @@
+"""
+Tests for kline parsing and market data writes
+"""
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects import mysql, postgresql
+from sqlalchemy.orm import sessionmaker
+
+from src.data_manager import UPSERT_BATCH_SIZE, DataManager, _kline_rows, to_price_ticks
+from src.database.models import Base, MarketData
+
+
+# Binance K 線格式：數值欄位為字串，時間為毫秒
+KLINE = [
+    1700000000000, "100.5", "110.0", "99.0", "105.25", "12.5",
+    1700000059999, "1312.5", 42, "6.0", "630.0", "0",
+]
+
+
+def _row(open_time_ms: int, close: float) -> dict:
+    kline = list(KLINE)
+    kline[0] = open_time_ms
+    kline[4] = str(close)
+    return _kline_rows("BTCUSDT", "1m", [kline])[0]
+
+
+def test_kline_rows_parses_types_in_utc():
+    row = _kline_rows("BTCUSDT", "1m", [KLINE])[0]
+
+    assert row == {
+        "symbol": "BTCUSDT",
+        "timeframe": "1m",
+        "open_time": datetime(2023, 11, 14, 22, 13, 20),
+        "close_time": datetime(2023, 11, 14, 22, 14, 19, 999000),
+        "open_price": 100.5,
+        "high_price": 110.0,
+        "low_price": 99.0,
+        "close_price": 105.25,
+        "volume": 12.5,
+        "quote_volume": 1312.5,
+        "trades_count": 42,
+    }
+    assert type(row["open_price"]) is float
+    assert type(row["trades_count"]) is int
+
+
+class RecordingSession:
+    """只記錄執行語句的 Session 替身，用於檢查各資料庫方言產生的 SQL"""
+
+    def __init__(self, dialect):
+        self.dialect = dialect
+        self.statements = []
+
+    def get_bind(self):
+        return self
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+
+    def sql(self, index: int = 0) -> str:
+        return str(self.statements[index].compile(dialect=self.dialect))
+
+
+@pytest.fixture
+def manager():
+    # 只測試寫入方法，不建立引擎與客戶端
+    return DataManager.__new__(DataManager)
+
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_sqlite_upsert_updates_existing_rows(manager, sqlite_session):
+    manager._upsert_market_data(sqlite_session, [_row(1700000000000, 105.0)])
+    manager._upsert_market_data(sqlite_session, [_row(1700000000000, 106.0), _row(1700000060000, 107.0)])
+
+    closes = sqlite_session.execute(select(MarketData.close_price).order_by(MarketData.open_time)).scalars().all()
+    assert closes == [106.0, 107.0]
+
+
+def test_sqlite_insert_without_update_keeps_existing_rows(manager, sqlite_session):
+    manager._upsert_market_data(sqlite_session, [_row(1700000000000, 105.0)])
+    manager._upsert_market_data(sqlite_session, [_row(1700000000000, 106.0)], update=False)
+
+    assert sqlite_session.execute(select(MarketData.close_price)).scalars().all() == [105.0]
+
+
+def test_upsert_splits_rows_into_batches(manager):
+    session = RecordingSession(postgresql.dialect())
+    rows = [_row(1700000000000 + i * 60000, 100.0) for i in range(UPSERT_BATCH_SIZE * 2 + 1)]
+
+    manager._upsert_market_data(session, rows)
+    assert len(session.statements) == 3
+
+
+def test_postgresql_upsert_uses_on_conflict(manager):
+    session = RecordingSession(postgresql.dialect())
+    manager._upsert_market_data(session, [_row(1700000000000, 105.0)])
+    manager._upsert_market_data(session, [_row(1700000000000, 105.0)], update=False)
+
+    assert "ON CONFLICT (symbol, timeframe, open_time) DO UPDATE SET" in session.sql(0)
+    assert "close_price = excluded.close_price" in session.sql(0)
+    assert "ON CONFLICT (symbol, timeframe, open_time) DO NOTHING" in session.sql(1)
+
+
+def test_mysql_upsert_uses_duplicate_key_update(manager):
+    session = RecordingSession(mysql.dialect())
+    manager._upsert_market_data(session, [_row(1700000000000, 105.0)])
+    manager._upsert_market_data(session, [_row(1700000000000, 105.0)], update=False)
+
+    assert "ON DUPLICATE KEY UPDATE" in session.sql(0)
+    assert session.sql(1).startswith("INSERT IGNORE INTO market_data")
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.sql = None
+        self.data = None
+        self.closed = False
+
+    def copy_expert(self, sql, buf):
+        self.sql = sql
+        self.data = buf.read()
+
+    def close(self):
+        self.closed = True
+
+
+def test_copy_market_data_streams_csv(manager):
+    cursor = RecordingCursor()
+    # session.connection().connection.cursor() 取得 DBAPI 游標
+    session = SimpleNamespace(connection=lambda: SimpleNamespace(connection=SimpleNamespace(cursor=lambda: cursor)))
+
+    manager._copy_market_data(session, [_row(1700000000000, 105.0)])
+
+    assert cursor.sql == (
+        "COPY market_data (symbol, timeframe, open_time, close_time, open_price, high_price, "
+        "low_price, close_price, volume, quote_volume, trades_count) FROM STDIN WITH CSV"
+    )
+    assert cursor.data.strip() == (
+        "BTCUSDT,1m,2023-11-14 22:13:20,2023-11-14 22:14:19.999000,100.5,110.0,99.0,105.0,12.5,1312.5,42"
+    )
+    assert cursor.closed
+
+
+@pytest.mark.parametrize("tick_size, prices, expected", [
+    (1, [100.0, 101.4, 99.6, 100.5], [100, 101, 100, 100]),
+    (0.5, [100.0, 100.5, 99.5, 101.25], [200, 201, 199, 202]),
+    (0.0001, [0.1234, 0.12345, 0.1233, 1.0], [1234, 1234, 1233, 10000]),
+])
+def test_to_price_ticks(tick_size, prices, expected):
+    df = pd.DataFrame([prices + [12.5]], columns=["open", "high", "low", "close", "volume"])
+
+    ticks = to_price_ticks(df, tick_size)
+    assert ticks[["open", "high", "low", "close"]].iloc[0].tolist() == expected
+    assert ticks["open"].dtype == np.int64
+    # 非價格欄位與原資料框不受影響
+    assert ticks["volume"].iloc[0] == 12.5
+    assert df["open"].iloc[0] == prices[0]
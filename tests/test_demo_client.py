@@ -0,0 +1,15 @@
+"""
+Tests for the demo trading client
+"""
+from src.demo_client import DemoModeClient
+
+
+def test_exchange_info_is_not_shared_between_calls():
+    client = DemoModeClient()
+    info = client.get_exchange_info()
+    info['symbols'][0]['status'] = 'BREAK'
+    info['symbols'].append({'symbol': 'XRPUSDT', 'status': 'TRADING'})
+
+    fresh = client.get_exchange_info()
+    assert [s['symbol'] for s in fresh['symbols']] == ['BTCUSDT', 'ETHUSDT', 'ADAUSDT']
+    assert all(s['status'] == 'TRADING' for s in fresh['symbols'])
@@ -0,0 +1,109 @@
+"""
+Tests for the Discord notifier
+"""
+import threading
+import time
+
+import pytest
+
+from src.discord_notifier import DISCORD_MAX_EMBEDS, DiscordNotifier
+
+
+def _embed_payload(title: str) -> dict:
+    return {"content": "", "username": "bot", "embeds": [{"title": title}]}
+
+
+def test_coalesce_merges_embed_only_messages():
+    merged = DiscordNotifier._coalesce([_embed_payload("a"), _embed_payload("b"), _embed_payload("c")])
+
+    assert len(merged) == 1
+    assert [embed["title"] for embed in merged[0]["embeds"]] == ["a", "b", "c"]
+
+
+def test_coalesce_respects_embed_limit():
+    payloads = [_embed_payload(str(i)) for i in range(DISCORD_MAX_EMBEDS + 3)]
+
+    merged = DiscordNotifier._coalesce(payloads)
+    assert [len(payload["embeds"]) for payload in merged] == [DISCORD_MAX_EMBEDS, 3]
+
+
+def test_coalesce_keeps_messages_with_content_separate():
+    text = {"content": "hello", "username": "bot"}
+    merged = DiscordNotifier._coalesce([_embed_payload("a"), text, _embed_payload("b")])
+
+    # 有文字內容的訊息不併入前一則；其後的 embed 也無法併入沒有 embeds 的訊息
+    assert merged == [
+        {"content": "", "username": "bot", "embeds": [{"title": "a"}]},
+        text,
+        {"content": "", "username": "bot", "embeds": [{"title": "b"}]},
+    ]
+
+
+
+@pytest.fixture
+def notifier(monkeypatch):
+    # 未設定 webhook 時不啟動背景執行緒；之後手動啟用，只檢查排入佇列的內容
+    monkeypatch.delenv("DISCORD_WEBHOOK", raising=False)
+    monkeypatch.delenv("DISCORD_WEBHOOK_URL", raising=False)
+    notifier = DiscordNotifier()
+    notifier.enabled = True
+    return notifier
+
+
+def test_each_trade_notification_gets_its_own_fields(notifier):
+    assert notifier.send_trade_notification({"symbol": "BTCUSDT", "side": "BUY", "quantity": 2, "price": 100})
+    assert notifier.send_trade_notification({"symbol": "ETHUSDT", "side": "SELL"})
+
+    first = notifier._q.get_nowait()["embeds"][0]["fields"]
+    second = notifier._q.get_nowait()["embeds"][0]["fields"]
+    assert first is not second
+    assert {field["name"]: field["value"] for field in first}["總金額"] == "$200.00"
+    assert {field["name"]: field["value"] for field in second}["交易對"] == "ETHUSDT"
+
+
+def test_portfolio_update_formats_values(notifier):
+    assert notifier.send_portfolio_update({
+        "total_value": 10500, "available_balance": 9000, "unrealized_pnl": -1.5,
+        "daily_pnl": 2, "pnl_percentage": 5, "active_positions": 3,
+    })
+
+    fields = notifier._q.get_nowait()["embeds"][0]["fields"]
+    assert [(field["name"], field["value"]) for field in fields] == [
+        ("總資產價值", "$10,500.00"),
+        ("可用餘額", "$9,000.00"),
+        ("未實現盈虧", "$-1.5000"),
+        ("今日盈虧", "$+2.0000"),
+        ("總盈虧百分比", "+5.00%"),
+        ("活躍持倉", "3"),
+    ]
+
+
+def _start_drain(notifier, post):
+    notifier._post = post
+    notifier._thread = threading.Thread(target=notifier._drain, daemon=True)
+    notifier._thread.start()
+
+
+def test_close_flushes_queued_messages_and_stops_thread(notifier):
+    posted = []
+    _start_drain(notifier, posted.append)
+    thread = notifier._thread
+    notifier.send_system_alert("first")
+    notifier.send_system_alert("second")
+
+    notifier.close(timeout=5)
+
+    assert not thread.is_alive()
+    assert [embed["description"] for payload in posted for embed in payload["embeds"]] == ["first", "second"]
+
+
+def test_close_gives_up_after_timeout(notifier):
+    release = threading.Event()
+    _start_drain(notifier, lambda payload: release.wait(5))
+    notifier.send_system_alert("stuck")
+
+    started = time.monotonic()
+    notifier.close(timeout=0.3)
+    assert time.monotonic() - started < 2
+    assert notifier._thread.is_alive()
+    release.set()
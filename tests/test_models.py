@@ -0,0 +1,93 @@
+"""
+Tests for market_data schema migration
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import QueuePool
+
+from src.database.models import (
+    Base,
+    DB_MAX_OVERFLOW,
+    DB_POOL_SIZE,
+    LEGACY_MARKET_DATA_INDEXES,
+    MarketData,
+    _get_engine,
+    _migrate_market_data_indexes,
+)
+
+
+INSERT_KLINE = text(
+    "INSERT INTO market_data (id, symbol, timeframe, open_time, close_time, open_price, high_price, "
+    "low_price, close_price, volume, quote_volume) "
+    "VALUES (:id, :symbol, '1m', :open_time, :open_time, 1, 1, 1, :close, 1, 1)"
+)
+
+
+def _legacy_engine():
+    """建立舊版結構的 market_data：沒有唯一索引，只有非唯一的舊索引"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX uq_symbol_timeframe_time"))
+        conn.execute(text(
+            f"CREATE INDEX {LEGACY_MARKET_DATA_INDEXES[0]} ON market_data (symbol, timeframe, open_time)"
+        ))
+    return engine
+
+
+def _index_names(engine) -> set:
+    return {ix["name"] for ix in inspect(engine).get_indexes(MarketData.__tablename__)}
+
+
+def test_migration_dedupes_before_creating_unique_index():
+    engine = _legacy_engine()
+    first = datetime(2024, 1, 1, 0, 0)
+    second = datetime(2024, 1, 1, 0, 1)
+    with engine.begin() as conn:
+        conn.execute(INSERT_KLINE, [
+            {"id": 1, "symbol": "BTCUSDT", "open_time": first, "close": 100.0},
+            {"id": 2, "symbol": "BTCUSDT", "open_time": first, "close": 101.0},
+            {"id": 3, "symbol": "BTCUSDT", "open_time": second, "close": 102.0},
+            {"id": 4, "symbol": "BTCUSDT", "open_time": first, "close": 103.0},
+            {"id": 5, "symbol": "ETHUSDT", "open_time": first, "close": 10.0},
+        ])
+
+    _migrate_market_data_indexes(engine)
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, close_price FROM market_data ORDER BY id")).all()
+    # 每組重複資料保留 id 最小的一筆
+    assert rows == [(1, 100.0), (3, 102.0), (5, 10.0)]
+
+    names = _index_names(engine)
+    assert "uq_symbol_timeframe_time" in names
+    assert not names & set(LEGACY_MARKET_DATA_INDEXES)
+    engine.dispose()
+
+
+def test_migration_is_a_no_op_on_current_schema():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    before = _index_names(engine)
+
+    _migrate_market_data_indexes(engine)
+    assert _index_names(engine) == before
+    engine.dispose()
+
+
+@pytest.mark.parametrize("url", ["sqlite://", "sqlite:///:memory:", "sqlite:///file::memory:?cache=shared&uri=true"])
+def test_in_memory_sqlite_engine_skips_pool_sizing(url):
+    engine = _get_engine(url)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+
+
+def test_file_engine_uses_sized_pool_with_overflow(tmp_path):
+    engine = _get_engine(f"sqlite:///{tmp_path / 'pool.db'}")
+
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool.size() == DB_POOL_SIZE
+    assert engine.pool._max_overflow == DB_MAX_OVERFLOW > 0
+    engine.dispose()
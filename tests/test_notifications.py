@@ -0,0 +1,125 @@
+"""
+Tests for notification batching
+"""
+import asyncio
+
+from src.notifications import (
+    DISCORD_MAX_EMBEDS,
+    NotificationManager,
+    NotificationType,
+    _join_messages,
+)
+
+
+def test_join_messages_packs_texts_up_to_max_length():
+    texts = ["a" * 4, "b" * 4, "c" * 4]
+    # 兩段合併後為 4 + 2 + 4 = 10 個字元
+    assert list(_join_messages(texts, max_length=10)) == ["aaaa\n\nbbbb", "cccc"]
+
+
+def test_join_messages_keeps_oversized_text_on_its_own():
+    assert list(_join_messages(["a" * 20, "b"], max_length=10)) == ["a" * 20, "b"]
+    assert list(_join_messages([], max_length=10)) == []
+
+
+def _recording_manager():
+    manager = NotificationManager()
+    manager.telegram_enabled = True
+    manager.discord_enabled = True
+    manager.flush_delay = 0
+    manager.telegram_posts = []
+    manager.discord_posts = []
+
+    async def post_telegram(text):
+        manager.telegram_posts.append(text)
+
+    async def post_discord(embeds):
+        manager.discord_posts.append(embeds)
+
+    manager._post_telegram = post_telegram
+    manager._post_discord = post_discord
+    return manager
+
+
+def test_burst_is_sent_as_one_telegram_message_and_chunked_discord_embeds():
+    manager = _recording_manager()
+    count = DISCORD_MAX_EMBEDS + 2
+
+    async def run():
+        for i in range(count):
+            await manager.send_notification(f"message {i}", NotificationType.TRADE)
+        await manager.aclose()
+
+    asyncio.run(run())
+
+    assert len(manager.telegram_posts) == 1
+    assert all(f"message {i}" in manager.telegram_posts[0] for i in range(count))
+    assert [len(embeds) for embeds in manager.discord_posts] == [DISCORD_MAX_EMBEDS, 2]
+
+
+def test_aclose_flushes_pending_notifications():
+    manager = _recording_manager()
+
+    async def run():
+        await manager.send_notification("shutdown", NotificationType.INFO)
+        await manager.aclose()
+
+    asyncio.run(run())
+    assert len(manager.telegram_posts) == 1
+    assert manager._queue is None
+
+
+def _enqueue_on_finished_loop(manager, message):
+    """在一個隨即結束的事件迴圈中排入通知，drain 任務來不及送出"""
+    async def stalled_drain(queue):
+        await asyncio.Event().wait()
+
+    async def enqueue():
+        await manager.send_notification(message, NotificationType.INFO)
+
+    manager._drain = stalled_drain
+    asyncio.run(enqueue())
+    del manager._drain
+
+
+def test_pending_notifications_survive_an_event_loop_change():
+    manager = _recording_manager()
+    _enqueue_on_finished_loop(manager, "from the first loop")
+
+    async def run():
+        await manager.send_notification("from the second loop", NotificationType.INFO)
+        await manager.aclose()
+
+    asyncio.run(run())
+
+    assert len(manager.telegram_posts) == 1
+    assert "from the first loop" in manager.telegram_posts[0]
+    assert "from the second loop" in manager.telegram_posts[0]
+
+
+def test_aclose_on_another_loop_flushes_leftover_notifications():
+    manager = _recording_manager()
+    _enqueue_on_finished_loop(manager, "left behind")
+
+    asyncio.run(manager.aclose())
+
+    assert len(manager.telegram_posts) == 1
+    assert "left behind" in manager.telegram_posts[0]
+
+
+def test_api_shutdown_closes_notification_manager(monkeypatch):
+    from src import api
+
+    closed = []
+
+    async def aclose():
+        closed.append(True)
+
+    async def serve():
+        # 與 uvicorn 相同，經由應用程式的 lifespan 啟動與關閉
+        async with api.app.router.lifespan_context(api.app):
+            assert not closed
+
+    monkeypatch.setattr(api.notification_manager, "aclose", aclose)
+    asyncio.run(serve())
+    assert closed == [True]
@@ -0,0 +1,98 @@
+"""
+Tests for the request weight token bucket
+"""
+import asyncio
+
+import pytest
+
+from src import rate_limiter
+from src.rate_limiter import TokenBucket, get_request_bucket, klines_weight
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock)
+    return clock
+
+
+def test_consume_within_capacity_does_not_wait(clock):
+    bucket = TokenBucket(capacity=10, refill_rate=5)
+    assert bucket.consume(4) == 0
+    assert bucket.consume(6) == 0
+    assert bucket.tokens == 0
+
+
+def test_consume_over_capacity_reports_wait_for_deficit(clock):
+    bucket = TokenBucket(capacity=10, refill_rate=5)
+    assert bucket.consume(10) == 0
+    # 不足 5 個令牌，以每秒 5 個補充需等待 1 秒
+    assert bucket.consume(5) == pytest.approx(1.0)
+    # 令牌可為負，後續呼叫者排在前一位之後
+    assert bucket.consume(5) == pytest.approx(2.0)
+
+
+def test_tokens_refill_up_to_capacity(clock):
+    bucket = TokenBucket(capacity=10, refill_rate=5)
+    bucket.consume(10)
+
+    clock.now += 1
+    assert bucket.consume(5) == 0
+
+    clock.now += 60
+    bucket.consume(0)
+    assert bucket.tokens == 10
+
+
+def test_sync_used_weight_only_lowers_tokens(clock):
+    bucket = TokenBucket(capacity=100, refill_rate=20)
+    bucket.sync_used_weight(used=1150, limit=1200)
+    assert bucket.tokens == 50
+
+    # 伺服器回報的剩餘額度較多時不增加令牌
+    bucket.sync_used_weight(used=0, limit=1200)
+    assert bucket.tokens == 50
+
+
+def test_acquire_sleeps_for_the_reported_wait(clock, monkeypatch):
+    slept = []
+    monkeypatch.setattr(rate_limiter.time, "sleep", slept.append)
+    bucket = TokenBucket(capacity=2, refill_rate=1)
+
+    bucket.acquire(2)
+    bucket.acquire(1)
+    assert slept == [pytest.approx(1.0)]
+
+
+def test_acquire_async_waits_without_blocking(clock, monkeypatch):
+    slept = []
+
+    async def fake_sleep(delay):
+        slept.append(delay)
+
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", fake_sleep)
+    bucket = TokenBucket(capacity=2, refill_rate=4)
+
+    async def run():
+        await bucket.acquire_async(2)
+        await bucket.acquire_async(2)
+
+    asyncio.run(run())
+    assert slept == [pytest.approx(0.5)]
+
+
+@pytest.mark.parametrize("limit, weight", [(1, 1), (99, 1), (100, 2), (499, 2), (500, 5), (1000, 5), (1500, 10)])
+def test_klines_weight(limit, weight):
+    assert klines_weight(limit) == weight
+
+
+def test_request_bucket_is_shared():
+    assert get_request_bucket() is get_request_bucket()
@@ -0,0 +1,57 @@
+"""
+Tests for the TTL/LRU cache
+"""
+from src import ttl_cache
+from src.ttl_cache import DEFAULT_KLINE_CACHE_TTL, TTLCache, kline_cache_ttl
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_get_returns_value_until_ttl_expires(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ttl_cache.time, "monotonic", clock)
+    cache = TTLCache()
+    cache.set("key", "value")
+
+    clock.now += 9.9
+    assert cache.get("key", ttl=10) == "value"
+
+    clock.now += 0.1
+    assert cache.get("key", ttl=10) is None
+    # 過期的項目在查詢時即被移除
+    assert cache.get("key", ttl=100) is None
+
+
+def test_missing_key_is_a_miss():
+    assert TTLCache().get("missing", ttl=10) is None
+
+
+def test_evicts_least_recently_used_entry():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # 讀取 a 後 b 成為最久未使用的項目
+    assert cache.get("a", ttl=60) == 1
+    cache.set("c", 3)
+
+    assert cache.get("b", ttl=60) is None
+    assert cache.get("a", ttl=60) == 1
+    assert cache.get("c", ttl=60) == 3
+
+
+def test_clear_drops_all_entries():
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.clear()
+    assert cache.get("a", ttl=60) is None
+
+
+def test_kline_cache_ttl_falls_back_to_default():
+    assert kline_cache_ttl("1h") == 600
+    assert kline_cache_ttl("1w") == DEFAULT_KLINE_CACHE_TTL